@@ -0,0 +1,222 @@
+import re
+import subprocess
+import numpy as np
+from moviepy.config import FFMPEG_BINARY
+from render_profiles import ffmpeg_audio_args
+
+# Formato de trabajo de la locución: PCM mono, la frecuencia nativa de los motores de TTS
+SPEECH_SAMPLE_RATE = 22050
+
+# Duración de cada ventana de análisis de nivel y umbral de silencio
+FRAME_DURATION = 0.02
+SILENCE_THRESHOLD_DB = -40.0
+
+# Silencio que se conserva al principio y al final, y pausa interna máxima
+EDGE_PADDING = 0.1
+MAX_PAUSE = 0.5
+
+# Nivel RMS objetivo de la voz, límite de pico y ganancia máxima (dBFS / dB)
+TARGET_LEVEL_DB = -20.0
+PEAK_LIMIT_DB = -1.0
+MAX_GAIN_DB = 20.0
+
+# Duración máxima por defecto de un video (límite de YouTube Shorts)
+DEFAULT_MAX_DURATION = 60
+
+# Aceleración máxima: por encima la voz deja de sonar natural
+MAX_SPEEDUP = 1.25
+
+
+def decode_pcm(path, sample_rate=SPEECH_SAMPLE_RATE, channels=1):
+    """Decodifica un audio a PCM de 16 bits (entrelazado si channels > 1) con el ffmpeg de MoviePy"""
+    result = subprocess.run([FFMPEG_BINARY, '-loglevel', 'error', '-i', path, '-f', 's16le',
+                             '-ac', str(channels), '-ar', str(sample_rate), '-'],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise Exception(f"Error de ffmpeg al decodificar {path}: {result.stderr.decode('utf-8', 'ignore').strip()}")
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def write_pcm(samples, filename, sample_rate=SPEECH_SAMPLE_RATE, output_args=None, channels=1):
+    """
+    Codifica PCM de 16 bits (entrelazado si tiene varios canales) en
+    filename. Sin output_args el formato lo decide la extensión.
+    """
+    result = subprocess.run([FFMPEG_BINARY, '-y', '-loglevel', 'error', '-f', 's16le', '-ac', str(channels),
+                             '-ar', str(sample_rate), '-i', '-', *(output_args or []), filename],
+                            input=samples.tobytes(), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise Exception(f"Error de ffmpeg al escribir {filename}: {result.stderr.decode('utf-8', 'ignore').strip()}")
+
+
+def probe_audio(path):
+    """
+    Códec, frecuencia y número de canales de la primera pista de audio de un
+    archivo, o None si no tiene audio.
+    """
+    result = subprocess.run([FFMPEG_BINARY, '-hide_banner', '-i', path],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    match = re.search(rb'Audio: (\w+)[^\n]*?, (\d+) Hz, ([\w.()]+)', result.stderr)
+    if not match:
+        return None
+    layout = match.group(3).decode('utf-8')
+    return {
+        "codec": match.group(1).decode('utf-8'),
+        "rate": int(match.group(2)),
+        "channels": {"mono": 1, "stereo": 2}.get(layout)
+    }
+
+
+def frame_levels(samples, sample_rate=SPEECH_SAMPLE_RATE, frame_duration=FRAME_DURATION):
+    """Nivel RMS en dBFS de cada ventana completa y el tamaño de ventana en muestras"""
+    size = max(1, int(sample_rate * frame_duration))
+    count = len(samples) // size
+    frames = samples[:count * size].reshape(count, size)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10)), size
+
+
+def trim_silence(samples, sample_rate=SPEECH_SAMPLE_RATE, threshold_db=SILENCE_THRESHOLD_DB,
+                 padding=EDGE_PADDING):
+    """Recorta el silencio inicial y final, dejando un pequeño margen"""
+    levels, size = frame_levels(samples, sample_rate)
+    voiced = np.flatnonzero(levels > threshold_db)
+    if not len(voiced):
+        return samples
+    pad = int(padding * sample_rate)
+    start = max(0, voiced[0] * size - pad)
+    end = min(len(samples), (voiced[-1] + 1) * size + pad)
+    return samples[start:end]
+
+
+def shorten_pauses(samples, sample_rate=SPEECH_SAMPLE_RATE, threshold_db=SILENCE_THRESHOLD_DB,
+                   max_pause=MAX_PAUSE):
+    """Acorta las pausas internas más largas que max_pause sin tocar la voz"""
+    levels, size = frame_levels(samples, sample_rate)
+    if not len(levels):
+        return samples
+    silent = levels <= threshold_db
+
+    # Posición de cada ventana dentro de su tramo de silencio
+    index = np.arange(len(levels))
+    last_voiced = np.maximum.accumulate(np.where(silent, -1, index))
+    position = index - last_voiced - 1
+    keep = ~silent | (position < int(max_pause / FRAME_DURATION))
+
+    frames = samples[:len(levels) * size].reshape(len(levels), size)
+    return np.concatenate([frames[keep].reshape(-1), samples[len(levels) * size:]])
+
+
+def loudness_gain(samples, sample_rate=SPEECH_SAMPLE_RATE, target_db=TARGET_LEVEL_DB,
+                  peak_db=PEAK_LIMIT_DB, threshold_db=SILENCE_THRESHOLD_DB):
+    """
+    Ganancia lineal que lleva el nivel RMS de la señal (sin contar los
+    silencios) a target_db sin que ningún pico supere peak_db. Acepta señales
+    mono o con varios canales en columnas.
+    """
+    mono = samples.mean(axis=1) if samples.ndim == 2 else samples
+    levels, _ = frame_levels(mono, sample_rate)
+    voiced = levels[levels > threshold_db]
+    if not len(voiced):
+        return 1.0
+    # Media de energía (no de decibelios) de las ventanas con sonido
+    voiced_db = 10 * np.log10(np.mean(10 ** (voiced / 10)))
+    gain = 10 ** (min(target_db - voiced_db, MAX_GAIN_DB) / 20)
+
+    peak = np.max(np.abs(samples)) * gain
+    peak_limit = 10 ** (peak_db / 20)
+    if peak > peak_limit:
+        gain *= peak_limit / peak
+    return gain
+
+
+def normalize_loudness(samples, sample_rate=SPEECH_SAMPLE_RATE, target_db=TARGET_LEVEL_DB,
+                       peak_db=PEAK_LIMIT_DB, threshold_db=SILENCE_THRESHOLD_DB):
+    """Ajusta el volumen de la voz a target_db (ver loudness_gain)"""
+    return samples * loudness_gain(samples, sample_rate, target_db, peak_db, threshold_db)
+
+
+def time_compress(samples, speed, sample_rate=SPEECH_SAMPLE_RATE, frame_duration=0.04):
+    """
+    Acelera la voz sin cambiar el tono mediante WSOLA: cada ventana de Hann
+    se toma cerca de su posición nominal (`speed` medios marcos después de la
+    anterior), desplazada lo necesario para continuar en fase con la ventana
+    previa, y las ventanas se suman cada medio marco. La búsqueda se hace
+    sobre la señal diezmada; con un solapamiento del 50% las ventanas pares y
+    las impares no se solapan entre sí, así que cada grupo se coloca con un
+    reshape.
+    """
+    size = max(2, int(sample_rate * frame_duration) // 2 * 2)
+    hop = size // 2
+    if speed <= 1.0 or len(samples) < size * 4:
+        return samples
+
+    tolerance = hop // 2
+    decimation = 4
+    count = int((len(samples) - size - tolerance) / (hop * speed))
+    starts = np.zeros(count, dtype=np.int64)
+    for k in range(1, count):
+        # Continuación natural de la ventana anterior y zona de búsqueda
+        template = samples[starts[k - 1] + hop:starts[k - 1] + size:decimation]
+        nominal = int(k * hop * speed)
+        low = max(0, nominal - tolerance)
+        region = samples[low:nominal + tolerance + hop:decimation]
+        correlation = np.correlate(region, template, mode='valid')
+        starts[k] = min(low + int(np.argmax(correlation)) * decimation, len(samples) - size)
+
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(size) / size)
+    frames = samples[starts[:, None] + np.arange(size)] * window
+
+    output = np.zeros((count + 1) * hop, dtype=samples.dtype)
+    even = frames[0::2].reshape(-1)
+    odd = frames[1::2].reshape(-1)
+    output[:len(even)] += even
+    output[hop:hop + len(odd)] += odd
+    return output
+
+
+def process_speech(path, output_path=None, target_duration=None, max_speedup=MAX_SPEEDUP, profile=None,
+                   music=None):
+    """
+    Prepara la locución para el video: recorta el silencio de los extremos,
+    acorta las pausas largas, normaliza el volumen y, si se indica
+    target_duration, acelera la voz (como mucho max_speedup) para que quepa.
+
+    Con un perfil de renderizado, el resultado se codifica directamente con
+    el códec, la frecuencia y los canales de audio del perfil (por ejemplo en
+    un .m4a), de modo que el video final copia la pista sin recodificarla.
+    Si además se indica una MusicLibrary (ver music_library.py), se mezcla
+    una pista de música de fondo que baja de volumen mientras se habla.
+
+    Returns:
+        dict: Duración original, duración final y aceleración aplicada
+    """
+    samples = decode_pcm(path).astype(np.float32) / 32768.0
+    original_duration = len(samples) / SPEECH_SAMPLE_RATE
+
+    samples = shorten_pauses(trim_silence(samples))
+
+    speed = 1.0
+    duration = len(samples) / SPEECH_SAMPLE_RATE
+    if target_duration and duration > target_duration:
+        speed = min(duration / target_duration, max_speedup)
+        samples = time_compress(samples, speed)
+        duration = len(samples) / SPEECH_SAMPLE_RATE
+        if duration > target_duration:
+            print(f"Aviso: la locución dura {duration:.1f}s incluso acelerada x{speed:.2f} "
+                  f"(objetivo: {target_duration:.1f}s)")
+
+    samples = normalize_loudness(samples)
+    sample_rate, channels = SPEECH_SAMPLE_RATE, 1
+    if music is not None and profile is not None:
+        mixed = music.mix(samples, SPEECH_SAMPLE_RATE, profile)
+        if mixed is not None:
+            samples, sample_rate, channels = mixed, profile["audio_rate"], profile["audio_channels"]
+
+    pcm = np.clip(samples * 32768.0, -32768, 32767).astype(np.int16)
+    write_pcm(pcm, output_path or path, sample_rate, ffmpeg_audio_args(profile) if profile else None, channels)
+    return {
+        "original_duration": round(original_duration, 3),
+        "duration": round(duration, 3),
+        "speed": round(speed, 3)
+    }
@@ -0,0 +1,61 @@
+from functools import lru_cache
+import numpy as np
+from moviepy.video.VideoClip import VideoClip
+
+# Paleta por defecto del fondo animado (tonos azul oscuro)
+DEFAULT_PALETTE = ((20, 30, 50), (40, 30, 80), (15, 60, 90), (20, 30, 50))
+
+
+class GradientBackground:
+    """
+    Fondo con un degradado diagonal en movimiento.
+
+    Todo el trabajo por píxel se hace una sola vez al crear el objeto: se
+    construye una franja de alto `height + period` con el degradado ya
+    coloreado mediante una tabla de paleta (LUT). Cada fotograma es solo
+    una vista desplazada de esa franja, sin copiar ni calcular píxeles.
+
+    Como la paleta es cíclica con periodo `period` píxeles, el desplazamiento
+    se repite cada `period / speed` segundos y el bucle no tiene costuras.
+    """
+    def __init__(self, size=(1080, 1920), palette=DEFAULT_PALETTE, period=960, speed=60, slope=0.35):
+        self.width, self.height = size
+        self.period = int(period)
+        self.speed = speed
+        self.loop_duration = self.period / speed
+        self.lut = self._build_palette_lut(palette, self.period)
+        self.strip = self._build_strip(slope)
+
+    @staticmethod
+    def _build_palette_lut(palette, length):
+        """Interpola linealmente los colores de la paleta en una tabla cíclica de `length` entradas"""
+        colors = np.asarray(palette, dtype=np.float32)
+        # Cerrar el ciclo para que la última entrada enlace con la primera
+        if not np.array_equal(colors[0], colors[-1]):
+            colors = np.vstack([colors, colors[:1]])
+        stops = np.linspace(0, length, len(colors))
+        positions = np.arange(length)
+        lut = np.stack([np.interp(positions, stops, colors[:, c]) for c in range(3)], axis=1)
+        return lut.round().astype(np.uint8)
+
+    def _build_strip(self, slope):
+        """Genera la franja base del degradado (una sola vez por fondo)"""
+        ys = np.arange(self.height + self.period, dtype=np.int32)[:, None]
+        xs = np.arange(self.width, dtype=np.int32)[None, :]
+        indices = (ys + (xs * slope).astype(np.int32)) % self.period
+        return self.lut[indices]
+
+    def get_frame(self, t):
+        """Obtiene el fotograma en el instante t como vista de la franja base"""
+        shift = int(round(t * self.speed)) % self.period
+        return self.strip[shift:shift + self.height]
+
+    def make_clip(self, duration):
+        """Crea un clip de MoviePy de cualquier duración reutilizando el mismo bucle"""
+        return VideoClip(frame_function=self.get_frame, duration=duration)
+
+
+@lru_cache(maxsize=8)
+def get_gradient_background(size=(1080, 1920), palette=DEFAULT_PALETTE):
+    """Obtiene un fondo degradado, construyéndolo solo la primera vez por proceso"""
+    return GradientBackground(size, palette)
@@ -0,0 +1,249 @@
+"""
+Benchmark del pipeline de video: renderiza posts sintéticos con distintas
+longitudes de texto, duraciones de audio, modos de renderizado y perfiles,
+y guarda tiempo real, tiempo de CPU, memoria máxima y tamaño de salida en un
+informe JSON que se puede comparar entre commits.
+
+Funciona sin conexión: si no hay una voz de TTS instalada se usa un tono
+generado con ffmpeg en lugar de la locución.
+
+Uso:
+    python benchmark_render.py
+    python benchmark_render.py --quick
+    python benchmark_render.py --output nuevo.json --compare benchmark_report.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    # Windows: no hay medición de CPU de subprocesos ni de memoria máxima
+    resource = None
+
+# Textos sintéticos por longitud
+TEXTS = {
+    "short": "TIL octopuses have three hearts.",
+    "medium": ("What is a small habit that completely changed your life for the better, "
+               "and how long did it take before you noticed the difference?"),
+    "long": ("TIFU by trying to impress my neighbours with a homemade pizza oven. I spent the "
+             "whole weekend building it out of bricks I found behind the garage, invited everyone "
+             "over, and proudly lit the fire. Turns out the bricks were not fire bricks at all. "
+             "Halfway through the first pizza one of them cracked with a sound like a gunshot, "
+             "the dog bolted through the fence, and the fire department showed up because somebody "
+             "down the street called them. The pizza was honestly great though.")
+}
+
+# Variantes de renderizado: argumentos de create_video
+VARIANTS = {
+    "still": {"render_mode": "still"},
+    "stream-animated": {"render_mode": "stream", "animated_bg": True},
+    "stream-captions": {"render_mode": "stream", "captions": True},
+    "composite": {"render_mode": "composite"}
+}
+
+DEFAULT_PROFILES = ["fast-draft", "shorts-balanced"]
+DEFAULT_DURATIONS = [5, 30]
+DEFAULT_LENGTHS = ["short", "long"]
+DEFAULT_VARIANTS = ["still", "stream-animated", "stream-captions"]
+
+
+def generate_audio(path, duration, kind='tone'):
+    """Genera un audio de prueba (tono o silencio) con el ffmpeg de MoviePy"""
+    from moviepy.config import FFMPEG_BINARY
+    source = f"sine=frequency=220:duration={duration}" if kind == 'tone' else \
+             f"anullsrc=r=22050:cl=mono:d={duration}"
+    subprocess.run([FFMPEG_BINARY, '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', source,
+                    '-ac', '1', path], check=True)
+
+
+def tts_available():
+    """Comprueba si pyttsx3 puede inicializarse y tiene alguna voz instalada"""
+    try:
+        import pyttsx3
+        engine = pyttsx3.init()
+        return bool(engine.getProperty('voices'))
+    except Exception:
+        return False
+
+
+def _usage_snapshot():
+    """Tiempo de CPU acumulado (proceso + subprocesos terminados) y memoria máxima en MB"""
+    if resource is None:
+        return time.process_time(), None
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    peak = max(own.ru_maxrss, children.ru_maxrss) / scale
+    return cpu, peak
+
+
+def _run_case(case, workdir, queue):
+    """Ejecuta un caso en un proceso aislado para medir su CPU y memoria por separado"""
+    try:
+        os.chdir(workdir)
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import bot
+        from render_profiles import RenderStats
+
+        output_path = f"{case['id']}.mp4"
+        kwargs = dict(VARIANTS[case["variant"]])
+
+        cpu_start, _ = _usage_snapshot()
+        start = time.perf_counter()
+        if case["kind"] == "tts":
+            bot.text_to_speech(TEXTS[case["length"]], output_path.replace('.mp4', '.mp3'))
+            output_path = output_path.replace('.mp4', '.mp3')
+        else:
+            bot.create_video(TEXTS[case["length"]], case["audio"], output_path,
+                             render_profile=case["profile"],
+                             render_stats=RenderStats('render_stats.json'), **kwargs)
+        wall = time.perf_counter() - start
+        cpu_end, peak = _usage_snapshot()
+
+        queue.put({
+            "wall_time": round(wall, 3),
+            "cpu_time": round(cpu_end - cpu_start, 3),
+            "peak_rss_mb": round(peak, 1) if peak is not None else None,
+            "output_bytes": os.path.getsize(output_path) if os.path.exists(output_path) else 0
+        })
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {str(e)}"})
+
+
+def run_case(case, workdir):
+    """Lanza un caso en un proceso hijo y espera su resultado"""
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_case, args=(case, workdir, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def build_cases(args, workdir):
+    """Construye la matriz de casos y genera los audios necesarios"""
+    cases = []
+    for duration in args.durations:
+        audio_path = os.path.join(workdir, f"audio_{duration}s.mp3")
+        generate_audio(audio_path, duration, args.audio)
+        for length in args.lengths:
+            for variant in args.variants:
+                for profile in args.profiles:
+                    cases.append({
+                        "id": f"{variant}_{profile}_{length}_{duration}s",
+                        "kind": "render",
+                        "variant": variant,
+                        "profile": profile,
+                        "length": length,
+                        "duration": duration,
+                        "audio": audio_path
+                    })
+
+    if args.tts:
+        if tts_available():
+            for length in args.lengths:
+                cases.append({"id": f"tts_{length}", "kind": "tts", "variant": "still",
+                              "profile": None, "length": length, "duration": None, "audio": None})
+        else:
+            print("No hay voces de TTS instaladas, se omite el benchmark de text_to_speech")
+    return cases
+
+
+def get_commit():
+    """Commit actual del repositorio, si está disponible"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare_reports(old_report, new_report):
+    """Muestra la variación de tiempo real y tamaño de cada caso respecto a otro informe"""
+    old_results = old_report.get("results", {})
+    print(f"\nComparación con {old_report['meta'].get('commit')} -> {new_report['meta'].get('commit')}:")
+    for case_id, new in sorted(new_report["results"].items()):
+        old = old_results.get(case_id)
+        if not old or "wall_time" not in old or "wall_time" not in new:
+            continue
+        wall_change = (new["wall_time"] / old["wall_time"] - 1) * 100 if old["wall_time"] else 0
+        size_change = (new["output_bytes"] / old["output_bytes"] - 1) * 100 if old["output_bytes"] else 0
+        print(f"  {case_id:45s} tiempo {wall_change:+6.1f}%   tamaño {size_change:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del pipeline de renderizado de videos')
+    parser.add_argument('--profiles', nargs='+', default=DEFAULT_PROFILES,
+                        help=f'Perfiles de renderizado (default: {" ".join(DEFAULT_PROFILES)})')
+    parser.add_argument('--variants', nargs='+', default=DEFAULT_VARIANTS, choices=list(VARIANTS),
+                        help=f'Variantes de renderizado (default: {" ".join(DEFAULT_VARIANTS)})')
+    parser.add_argument('--durations', nargs='+', type=int, default=DEFAULT_DURATIONS,
+                        help='Duraciones del audio en segundos (default: 5 30)')
+    parser.add_argument('--lengths', nargs='+', default=DEFAULT_LENGTHS, choices=list(TEXTS),
+                        help='Longitudes de texto (default: short long)')
+    parser.add_argument('--audio', choices=['tone', 'silence'], default='tone',
+                        help='Audio sintético para los renders (default: tone)')
+    parser.add_argument('--tts', action='store_true',
+                        help='Mide también text_to_speech si hay una voz instalada')
+    parser.add_argument('--quick', action='store_true',
+                        help='Ejecuta una sola combinación pequeña por variante')
+    parser.add_argument('--output', default='benchmark_report.json',
+                        help='Archivo JSON de resultados (default: benchmark_report.json)')
+    parser.add_argument('--compare', help='Informe anterior con el que comparar los resultados')
+    args = parser.parse_args()
+
+    if args.quick:
+        args.profiles, args.durations, args.lengths = ['fast-draft'], [5], ['medium']
+
+    workdir = tempfile.mkdtemp(prefix='render_bench_')
+    try:
+        cases = build_cases(args, workdir)
+        results = {}
+        for i, case in enumerate(cases, 1):
+            print(f"[{i}/{len(cases)}] {case['id']}...", flush=True)
+            result = run_case(case, workdir)
+            result.update({k: case[k] for k in ("variant", "profile", "length", "duration")})
+            results[case["id"]] = result
+            if "error" in result:
+                print(f"  ERROR: {result['error']}")
+            else:
+                print(f"  {result['wall_time']:.2f}s real, {result['cpu_time']:.2f}s CPU, "
+                      f"{result['peak_rss_mb']} MB, {result['output_bytes'] / 1024:.0f} KB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": get_commit(),
+            "date": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "audio": args.audio
+        },
+        "results": results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\nInforme guardado en {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            compare_reports(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,5 @@
 import os
 from dotenv import load_dotenv
-import praw
-import pyttsx3
 import numpy as np
 import pickle
 import json
@@ -17,9 +15,24 @@ from googleapiclient.discovery import build
 import random
 import time
 from datetime import datetime
-from post_tracker import PostTracker
+from post_tracker import get_post_tracker
 from quota_manager import QuotaManager
 from content_diversifier import ContentDiversifier
+from candidate_pool import get_candidate_pool
+from content_filter import get_content_filter
+from reddit_fetcher import get_reddit_fetcher
+from reddit_replay import ReplayRedditFetcher
+from tts_service import get_tts_service, synthesize_text
+from tts_cache import get_tts_cache
+from audio_processing import DEFAULT_MAX_DURATION, process_speech
+from video_renderer import RENDER_MODES, AlphaLayer, StreamRenderer, write_still_video
+from text_layout import fit_text, render_text_card
+from backgrounds import DEFAULT_PALETTE, get_gradient_background
+from themes import ThemeManager
+from branding import BrandingSegments
+from music_library import get_music_library
+from captions import CaptionLayer, estimate_word_timings, render_caption_card
+from render_profiles import DEFAULT_RENDER_PROFILE, RENDER_PROFILES, RenderStats, get_render_profile, moviepy_write_args
 
 # 1. Cargar variables de entorno
 load_dotenv()
@@ -28,185 +41,285 @@ CLIENT_SECRET = os.getenv('CLIENT_SECRET')
 USER_AGENT = os.getenv('USER_AGENT')
 
 # 2. Conectarse a Reddit y extraer un post viral que no se haya usado antes
-def get_viral_post(post_tracker=None, content_diversifier=None):
+def reddit_credentials():
+    """Credenciales de Reddit del archivo .env"""
+    return {"client_id": CLIENT_ID, "client_secret": CLIENT_SECRET, "user_agent": USER_AGENT}
+
+def get_viral_post(post_tracker=None, content_diversifier=None, candidate_pool=None, reddit_fetcher=None):
+    """
+    Elige un post viral que no se haya usado antes entre los candidatos del
+    pool local (ver candidate_pool.py). Solo se consulta Reddit cuando el pool
+    todavía no tiene algún listado necesario, por ejemplo en la primera
+    ejecución, o, si no hay un recolector en segundo plano que lo mantenga
+    al día (ejecución suelta de bot.py), cuando el listado ha caducado. Los
+    listados que hay que descargar de toda la cadena de alternativas se
+    descargan a la vez (ver reddit_fetcher.py).
+    
+    reddit_fetcher permite sustituir Reddit por otro descargador con la misma
+    interfaz, como el Reddit local de reddit_replay.py.
+    """
     # Inicializar post_tracker si no se proporciona
     if post_tracker is None:
-        post_tracker = PostTracker()
+        post_tracker = get_post_tracker()
     
     # Inicializar diversificador de contenido si no se proporciona
     if content_diversifier is None:
         content_diversifier = ContentDiversifier()
     
-    # Crear conexión a Reddit
-    reddit = praw.Reddit(client_id=CLIENT_ID,
-                        client_secret=CLIENT_SECRET,
-                        user_agent=USER_AGENT)
+    if candidate_pool is None:
+        candidate_pool = get_candidate_pool()
     
     # Seleccionar subreddit y filtro de tiempo aleatoriamente
     subreddit_name = content_diversifier.select_random_subreddit()
     time_filter = content_diversifier.select_time_filter()
     
-    print(f"Buscando en r/{subreddit_name} (filtro: {time_filter})")
+    # Subreddit alternativo por si no hay posts adecuados en el primero
+    alternate_subreddit = content_diversifier.select_random_subreddit()
+    while alternate_subreddit == subreddit_name and len(content_diversifier.config["active_subreddits"]) > 1:
+        alternate_subreddit = content_diversifier.select_random_subreddit()
     
-    # Obtener subreddit
-    subreddit = reddit.subreddit(subreddit_name)
+    # Cadena de búsqueda en orden de prioridad: en el primer subreddit se
+    # ignoran los posts con URL (probablemente imágenes o videos) y, si no hay
+    # posts adecuados, se prueba el alternativo y AskReddit como último recurso.
+    # En cada listado los candidatos se ordenan por viralidad (ver virality.py)
+    search_chain = [
+        (subreddit_name, time_filter, {"limit": 5}),
+        (alternate_subreddit, time_filter, {"limit": 3, "allow_links": True}),
+        ('AskReddit', 'day', {"limit": 3, "allow_links": True})
+    ]
     
-    # Número de intentos máximos
-    max_attempts = 10
-    attempts = 0
+    # Reglas de contenido de content_config.json y del historial de posts usados
+    filters = {
+        "is_used": post_tracker.is_post_used,
+        "is_duplicate": post_tracker.is_duplicate_title,
+        "content_filter": get_content_filter(content_diversifier.config.get("filters"))
+    }
+    
+    # Sin recolector, los listados caducados se vuelven a descargar aquí; si
+    # la descarga falla se sigue usando la versión guardada
+    harvesting = candidate_pool.is_harvesting()
+    
+    def needs_fetch(listing):
+        if harvesting:
+            return not candidate_pool.has_listing(*listing)
+        return candidate_pool.is_stale(*listing)
+    
+    filter_stats = filters["content_filter"].get_stats()
+    
+    # Candidatos de los listados recién descargados, por paso de la cadena,
+    # para no evaluarlos dos veces. Un mismo listado puede aparecer en dos
+    # pasos (por ejemplo, si el principal es AskReddit del día): se evalúa
+    # con las opciones del primero, y los siguientes lo leen del pool con
+    # las suyas
+    checked = {}
+    fetch_steps = {}
+    
+    def store_and_check(listing, records):
+        step = fetch_steps[listing]
+        candidate_pool.store_listing(listing[0], listing[1], records)
+        checked[step] = candidate_pool.get_candidates(*listing, **search_chain[step][2], **filters)
+        return bool(checked[step])
     
-    # Lista para almacenar posts candidatos
     candidate_posts = []
-    
-    # Buscar posts populares
-    for post in subreddit.top(time_filter=time_filter, limit=20):
-        attempts += 1
-        
-        # Ignorar posts que ya se han usado
-        if post_tracker.is_post_used(post.id):
-            continue
-        
-        # Ignorar posts muy cortos o muy largos
-        if len(post.title) < 15 or len(post.title) > 250:
-            continue
-        
-        # Ignorar posts con URL (probablemente imágenes o videos)
-        if hasattr(post, 'url_overridden_by_dest'):
-            continue
-        
-        # Ignorar posts NSFW
-        if post.over_18:
-            continue
+    for index, (name, tf, opts) in enumerate(search_chain):
+        if index == 0:
+            print(f"Buscando en r/{name} (filtro: {tf})")
+        elif index == 1:
+            print(f"No se encontraron posts adecuados en r/{subreddit_name}, probando otro subreddit...")
+            print(f"Probando con r/{name}")
+        else:
+            print("No se encontraron posts adecuados, probando con AskReddit como último recurso...")
         
-        # Añadir a candidatos
-        candidate_posts.append(post)
+        if needs_fetch((name, tf)):
+            # Descargar a la vez este listado y los siguientes de la cadena que
+            # falten: en el peor caso la búsqueda cuesta una sola espera a Reddit
+            fetch_steps.clear()
+            seen = set()
+            for step in range(index, len(search_chain)):
+                listing = search_chain[step][:2]
+                if (listing[0].lower(), listing[1]) not in seen and needs_fetch(listing):
+                    fetch_steps[listing] = step
+                seen.add((listing[0].lower(), listing[1]))
+            print(f"Descargando {len(fetch_steps)} listado(s) que faltan o han caducado en el pool de candidatos...")
+            fetcher = reddit_fetcher or get_reddit_fetcher(reddit_credentials())
+            fetcher.fetch_first(list(fetch_steps), candidate_pool.limit, store_and_check)
         
-        # Si tenemos suficientes candidatos o hemos alcanzado el límite de intentos
-        if len(candidate_posts) >= 5 or attempts >= max_attempts:
+        if index in checked:
+            candidate_posts = checked.pop(index)
+        else:
+            candidate_posts = candidate_pool.get_candidates(name, tf, **opts, **filters)
+        if candidate_posts:
             break
-    
-    # Si no encontramos ningún post adecuado, probar con otro subreddit
-    if not candidate_posts:
-        print(f"No se encontraron posts adecuados en r/{subreddit_name}, probando otro subreddit...")
-        
-        # Intentar con un subreddit diferente
-        alternate_subreddit = content_diversifier.select_random_subreddit()
-        while alternate_subreddit == subreddit_name and len(content_diversifier.config["active_subreddits"]) > 1:
-            alternate_subreddit = content_diversifier.select_random_subreddit()
-        
-        print(f"Probando con r/{alternate_subreddit}")
-        subreddit = reddit.subreddit(alternate_subreddit)
-        
-        for post in subreddit.top(time_filter=time_filter, limit=10):
-            # Realizar las mismas verificaciones
-            if not post_tracker.is_post_used(post.id) and len(post.title) >= 15 and len(post.title) <= 250 and not post.over_18:
-                candidate_posts.append(post)
-                if len(candidate_posts) >= 3:
-                    break
-    
-    # Si aún no encontramos posts adecuados, probar con AskReddit como fallback
-    if not candidate_posts:
-        print("No se encontraron posts adecuados, probando con AskReddit como último recurso...")
-        subreddit = reddit.subreddit('AskReddit')
         
-        for post in subreddit.top(time_filter='day', limit=10):
-            if not post_tracker.is_post_used(post.id) and len(post.title) >= 15 and len(post.title) <= 250 and not post.over_18:
-                candidate_posts.append(post)
-                if len(candidate_posts) >= 3:
-                    break
+        if index == 1:
+            # Antes de recurrir a AskReddit, los más virales de todo el pool
+            print("Buscando los posts más virales de todos los subreddits del pool...")
+            candidate_posts = candidate_pool.get_top_candidates(
+                content_diversifier.config["active_subreddits"], content_diversifier.config["time_filters"],
+                limit=3, allow_links=True, **filters)
+            if candidate_posts:
+                break
     
     # Si todavía no hay posts, devolver None
     if not candidate_posts:
         print("No se encontraron posts adecuados después de varios intentos.")
+        print(f"Posts descartados por regla: {filters['content_filter'].get_stats_since(filter_stats)['rejected']}")
         return None, None, None
     
-    # Seleccionar un post aleatorio de los candidatos (priorizar los primeros)
-    weights = [100 - (i * 10) for i in range(len(candidate_posts))]
+    # Seleccionar un post aleatorio de los candidatos, con más probabilidad
+    # cuanto más viral sea
+    weights = [max(post.virality, 0.01) for post in candidate_posts]
     selected_post = random.choices(candidate_posts, weights=weights, k=1)[0]
     
     # Registrar el post como usado
     post_tracker.add_post(
         selected_post.id, 
-        selected_post.subreddit.display_name, 
+        selected_post.subreddit, 
         selected_post.title,
         f"https://www.reddit.com{selected_post.permalink}"
     )
     
     # Devolver información del post
-    subreddit_name = selected_post.subreddit.display_name
+    subreddit_name = selected_post.subreddit
     
-    print(f"Post seleccionado de r/{subreddit_name}: {selected_post.title}")
+    print(f"Post seleccionado de r/{subreddit_name} (viralidad {selected_post.virality:.2f}): {selected_post.title}")
     return selected_post.title, selected_post.id, subreddit_name
 
 # 3. Convertir texto a voz y guardar como audio.mp3
-def text_to_speech(text, filename='audio.mp3'):
-    engine = pyttsx3.init()
-    # Selecciona una voz en inglés si está disponible
-    voices = engine.getProperty('voices')
-    for v in voices:
-        lang = v.languages[0].decode('utf-8') if v.languages and hasattr(v.languages[0], 'decode') else ''
-        if 'en' in lang or 'English' in v.name:
-            engine.setProperty('voice', v.id)
-            break
-    engine.save_to_file(text, filename)
-    engine.runAndWait()
+def text_to_speech(text, filename='audio.mp3', use_cache=True):
+    # El motor y la voz en inglés se inicializan una sola vez por proceso
+    service = get_tts_service()
+    if not use_cache:
+        synthesize_text(text, filename)
+        return
+
+    # Si ya se sintetizó este texto con la misma voz, reutilizar el audio
+    cache = get_tts_cache()
+    key = cache.make_key(text, extension=os.path.splitext(filename)[1], **service.voice_settings())
+    if cache.fetch(key, filename):
+        print("Audio recuperado de la caché de TTS")
+        return
+    # Los textos largos se sintetizan por frases en paralelo
+    synthesize_text(text, filename)
+    if os.path.exists(filename):
+        cache.store(key, filename)
 
 # 4. Crear fondo animado (degradado en movimiento)
-def make_animated_bg(duration, size=(1080,1920)):
-    # Un simple ColorClip como fondo
-    return ColorClip(size, color=(20, 30, 50), duration=duration)
+def make_animated_bg(duration, size=(1080,1920), animated=True, palette=DEFAULT_PALETTE):
+    """
+    Crea el fondo del video. Con animated=True es un degradado en movimiento
+    cuyo bucle se construye una sola vez por proceso (ver backgrounds.py);
+    con animated=False es un color plano, que permite el modo "still".
+    """
+    if not animated:
+        return ColorClip(size, color=tuple(palette[0]), duration=duration)
+    return get_gradient_background(tuple(size), tuple(tuple(color) for color in palette)).make_clip(duration)
 
 # 5. Crear video y superponer texto
-def create_video(text, audio_path, output_path='output.mp4'):
+def create_video(text, audio_path, output_path='output.mp4', render_mode='auto',
+                 render_profile=DEFAULT_RENDER_PROFILE, render_stats=None, animated_bg=False,
+                 captions=False, theme=None, branding=None):
+    """
+    Crea el video vertical con el texto sobre el fondo y la locución.
+
+    Args:
+        render_mode: 'auto' usa 'still' (un único fotograma en bucle) cuando
+            nada cambia en pantalla y, si no, 'stream' (fotogramas compuestos
+            en un búfer reutilizable y enviados a ffmpeg). 'composite' fuerza
+            el renderizado con CompositeVideoClip de MoviePy
+        render_profile: Nombre del perfil de codificación (ver render_profiles.py)
+        render_stats: RenderStats donde registrar el tiempo y tamaño de la codificación
+        animated_bg: Si es True usa el fondo degradado animado en lugar del color plano
+        captions: Si es True resalta cada palabra mientras se pronuncia (requiere
+            el modo 'stream')
+        theme: ThemeTemplate con el fondo, los colores y la insignia ya
+            renderizados (ver themes.py); por defecto se usa el tema base
+        branding: BrandingSegments con la entrada y salida de marca, que se
+            unen al video sin recodificar (no disponible en modo 'composite')
+    """
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"Modo de renderizado no válido: {render_mode}")
+    if captions and render_mode not in ('auto', 'stream'):
+        raise ValueError("Los subtítulos sincronizados solo están disponibles en el modo 'stream'")
+    if branding is not None and render_mode == 'composite':
+        raise ValueError("La entrada y salida de marca no están disponibles en el modo 'composite'")
+    profile = get_render_profile(render_profile)
+    if theme is None:
+        theme = ThemeManager().get_template()
+    animated = animated_bg or theme.animated
+
     audio = AudioFileClip(audio_path)
     duration = audio.duration  # Usamos exactamente la duración del audio
     
-    # Fondo simple
-    bg = make_animated_bg(duration)
-    
-    # Crear un TextClip simple
-    # Creamos una imagen en blanco con el texto
-    from PIL import Image, ImageDraw, ImageFont
-    img = Image.new('RGB', (1080, 1920), color=(20, 30, 50))
-    draw = ImageDraw.Draw(img)
-    
-    # Intentamos usar una fuente más grande y gruesa para mejor legibilidad
-    try:
-        font = ImageFont.truetype("arial.ttf", 60)  # Intenta usar Arial
-    except:
-        try:
-            font = ImageFont.truetype("Arial.ttf", 60)  # Intenta con otra capitalización
-        except:
-            try:
-                font = ImageFont.truetype("DejaVuSans-Bold.ttf", 60)  # Intenta usar DejaVu Sans Bold
-            except:
-                font = ImageFont.load_default()  # Si todo falla, usa la fuente por defecto
-    
-    # Ajustar el texto para que quepa en el ancho (60 caracteres por línea aproximadamente)
-    import textwrap
-    wrapped_text = textwrap.fill(text, width=40)
-    
-    # Dibuja el texto centrado con sombra para mejor legibilidad
-    # Primero la sombra
-    draw.text((543, 963), wrapped_text, fill="black", anchor="mm", font=font)
-    # Luego el texto principal
-    draw.text((540, 960), wrapped_text, fill="white", anchor="mm", font=font)
-    
-    img_path = "temp_text.png"
-    img.save(img_path)
-    
-    # Usar la imagen como clip
-    txt_clip = ImageClip(img_path)
-    txt_clip = txt_clip.with_duration(duration)
-    txt_clip = txt_clip.with_position('center')
-    
-    # Componer video
-    video = CompositeVideoClip([bg, txt_clip])
-    video = video.with_audio(audio)
-    video = video.with_duration(duration)
-    
-    # Guardar video
-    video.write_videofile(output_path, fps=24)
+    # Fondo: la plantilla ya renderizada del tema o el degradado animado con
+    # la insignia del tema como capa superior
+    overlays = []
+    if animated:
+        bg = make_animated_bg(duration, palette=theme.palette)
+        overlays.append(theme.chrome)
+    else:
+        bg = ImageClip(theme.frame).with_duration(duration)
+    
+    # Ajustar el texto a la zona segura con el mayor tamaño de fuente posible
+    layout = fit_text(text, fonts=theme.fonts)
+    
+    if captions:
+        # Texto base palabra a palabra, alineado con las capas de resaltado
+        card = render_caption_card(layout, fill=theme.text_color)
+        words = [word for word, _, _ in layout.word_positions(540, 960)]
+        caption_layer = CaptionLayer(layout, estimate_word_timings(words, audio, duration),
+                                     highlight=theme.highlight_color)
+    else:
+        # Imagen transparente con el texto para superponerla al fondo
+        card = render_text_card(layout, theme.text_color)
+    overlays.append(card)
+    
+    # Si nada cambia en pantalla basta con codificar un solo fotograma en bucle
+    if render_mode == 'auto':
+        render_mode = 'stream' if animated or captions else 'still'
+    
+    # Con marca, el cuerpo se codifica aparte y luego se concatena
+    final_path = output_path
+    if branding is not None:
+        output_path = f'{os.path.splitext(final_path)[0]}.body.mp4'
+    
+    encode_start = time.time()
+    if render_mode == 'still':
+        print('Composición estática, usando el modo de renderizado "still"')
+        frame = np.array(bg.get_frame(0), dtype=np.uint8)
+        for overlay in overlays:
+            AlphaLayer(overlay, frame_size=(frame.shape[1], frame.shape[0])).blit(frame, 0)
+        write_still_video(frame, audio_path, output_path, duration, profile)
+    elif render_mode == 'stream':
+        renderer = StreamRenderer(bg.get_frame, fps=profile["fps"], static_background=not animated)
+        for overlay in overlays:
+            renderer.add_overlay(overlay)
+        if captions:
+            renderer.add_layer(caption_layer)
+        renderer.write(output_path, audio_path, duration, profile)
+    else:
+        # Usar las capas como clips directamente desde memoria (sin archivos
+        # temporales); el canal alfa se convierte en la máscara de cada clip
+        layers = [ImageClip(overlay).with_duration(duration) for overlay in overlays]
+        video = CompositeVideoClip([bg] + layers)
+        video = video.with_audio(audio)
+        video = video.with_duration(duration)
+        video.write_videofile(output_path, **moviepy_write_args(profile))
+    
+    if branding is not None:
+        if not branding.wrap(output_path, final_path, profile, theme):
+            os.replace(output_path, final_path)
+        elif os.path.exists(output_path):
+            os.remove(output_path)
+        output_path = final_path
+    encode_time = time.time() - encode_start
+
+    # Registrar tiempo de codificación y tamaño del archivo por perfil
+    if render_stats is None:
+        render_stats = RenderStats()
+    encode_data = render_stats.register_encode(profile["name"], output_path, encode_time, duration, render_mode)
+    print(f'Video codificado con el perfil "{profile["name"]}" en {encode_time:.1f}s '
+          f'({encode_data["file_size"] / (1024 * 1024):.1f} MB)')
 
 def youtube_authenticate():
     """
@@ -428,13 +541,29 @@ def upload_video_to_youtube(video_path, title, description, tags=None, privacy_s
         print('Verifica tus credenciales y permisos, y vuelve a intentarlo')
         return None
 
-def main_bot_process(no_upload=False):
+def prepare_music(render_profile=DEFAULT_RENDER_PROFILE):
+    """Decodifica las pistas de música al arrancar, antes del primer video"""
+    library = get_music_library(ContentDiversifier().config)
+    prepared = library.prepare(get_render_profile(render_profile))
+    print(f"Música de fondo: {prepared} pista(s) preparadas en {library.cache_dir}/")
+
+def main_bot_process(no_upload=False, render_profile=DEFAULT_RENDER_PROFILE, animated_bg=False,
+                     captions=False, branding=False, max_duration=DEFAULT_MAX_DURATION, music=False,
+                     reddit_fetcher=None):
     """
     Proceso principal del bot, desde la obtención del post hasta la subida
     a YouTube.
     
     Args:
         no_upload: Si es True, solo genera el video sin subirlo
+        render_profile: Perfil de codificación del video (ver render_profiles.py)
+        animated_bg: Si es True usa el fondo degradado animado
+        captions: Si es True resalta cada palabra mientras se pronuncia
+        branding: Si es True añade la entrada y salida de marca configuradas
+        max_duration: Duración máxima del video en segundos; la locución se
+            acelera si hace falta para no superarla (0 para no limitarla)
+        music: Si es True mezcla música de fondo bajo la locución
+        reddit_fetcher: Descargador de listados en lugar de Reddit (ver reddit_replay.py)
         
     Returns:
         bool: True si el proceso fue exitoso, False en caso contrario
@@ -445,9 +574,12 @@ def main_bot_process(no_upload=False):
         print('=' * 60)
         
         # Inicializar los componentes necesarios
-        post_tracker = PostTracker()
+        post_tracker = get_post_tracker()
         quota_manager = QuotaManager()
         content_diversifier = ContentDiversifier()
+        theme_manager = ThemeManager(content_diversifier.config, content_diversifier=content_diversifier)
+        branding_segments = BrandingSegments(content_diversifier.config) if branding else None
+        music_library = get_music_library(content_diversifier.config) if music else None
         
         # Verificar si tenemos cuota disponible para subir videos
         if not no_upload and not quota_manager.can_upload():
@@ -460,7 +592,8 @@ def main_bot_process(no_upload=False):
         
         # 1. Obtener post viral de Reddit
         print('\n[1] Obteniendo post viral de Reddit...')
-        post_text, post_id, subreddit_name = get_viral_post(post_tracker, content_diversifier)
+        post_text, post_id, subreddit_name = get_viral_post(post_tracker, content_diversifier,
+                                                             reddit_fetcher=reddit_fetcher)
         if not post_text or not post_id:
             print('ERROR: No se pudo obtener un post adecuado de Reddit.')
             print('Verifica tus credenciales de Reddit en el archivo .env')
@@ -470,17 +603,35 @@ def main_bot_process(no_upload=False):
         
         # 2. Generar audio con TTS
         print('\n[2] Generando locución...')
-        audio_file = f'audio_{post_id}.mp3'
-        text_to_speech(post_text, audio_file)
-        if not os.path.exists(audio_file):
+        # La voz se sintetiza en WAV (el formato nativo de los motores, sin pérdida)
+        raw_audio_file = f'audio_{post_id}.wav'
+        text_to_speech(post_text, raw_audio_file)
+        if not os.path.exists(raw_audio_file):
             print('ERROR: No se pudo generar el archivo de audio.')
             return False
-        print(f'Audio generado correctamente como {audio_file}')
+        print(f'Audio generado correctamente como {raw_audio_file}')
+        
+        # Recortar silencios, normalizar el volumen y ajustar la duración. El
+        # resultado se codifica una sola vez en el formato de audio del perfil
+        # para que el video final copie la pista sin recodificarla
+        target_duration = None
+        if max_duration:
+            target_duration = max_duration - (branding_segments.get_duration() if branding_segments else 0)
+        audio_file = f'audio_{post_id}.m4a'
+        audio_stats = process_speech(raw_audio_file, audio_file, target_duration=target_duration,
+                                     profile=get_render_profile(render_profile), music=music_library)
+        os.remove(raw_audio_file)
+        print(f'Locución procesada: {audio_stats["original_duration"]:.1f}s -> {audio_stats["duration"]:.1f}s'
+              + (f' (acelerada x{audio_stats["speed"]:.2f})' if audio_stats["speed"] > 1 else ''))
         
         # 3. Crear video con texto
         print('\n[3] Creando video...')
         video_file = f'output_{post_id}.mp4'
-        create_video(post_text, audio_file, video_file)
+        theme = theme_manager.get_template(subreddit_name)
+        print(f'Usando el tema visual "{theme.name}"')
+        create_video(post_text, audio_file, video_file, render_profile=render_profile,
+                     animated_bg=animated_bg, captions=captions, theme=theme,
+                     branding=branding_segments)
         if not os.path.exists(video_file):
             print('ERROR: No se pudo generar el archivo de video.')
             return False
@@ -566,10 +717,6 @@ def cleanup_temp_files(audio_file, video_file=None, keep_video=False):
             os.remove(audio_file)
             print(f"Archivo temporal eliminado: {audio_file}")
         
-        # Eliminar imagen de texto temporal si existe
-        if os.path.exists("temp_text.png"):
-            os.remove("temp_text.png")
-        
         # Eliminar video solo si se especifica y no queremos conservarlo
         if video_file and not keep_video and os.path.exists(video_file):
             os.remove(video_file)
@@ -583,10 +730,24 @@ if __name__ == '__main__':
         import argparse
         parser = argparse.ArgumentParser(description='Bot para generar videos de Reddit y subirlos a YouTube')
         parser.add_argument('--no-upload', action='store_true', help='Solo genera el video, sin subirlo a YouTube')
+        parser.add_argument('--render-profile', choices=list(RENDER_PROFILES), default=DEFAULT_RENDER_PROFILE,
+                            help=f'Perfil de codificación del video (default: {DEFAULT_RENDER_PROFILE})')
+        parser.add_argument('--animated-bg', action='store_true', help='Usa un fondo degradado animado en lugar de un color plano')
+        parser.add_argument('--captions', action='store_true', help='Resalta cada palabra del texto mientras se pronuncia')
+        parser.add_argument('--branding', action='store_true', help='Añade la entrada y salida de marca configuradas')
+        parser.add_argument('--max-duration', type=float, default=DEFAULT_MAX_DURATION,
+                            help=f'Duración máxima del video en segundos, 0 sin límite (default: {DEFAULT_MAX_DURATION})')
+        parser.add_argument('--music', action='store_true', help='Mezcla música de fondo (carpeta music/) bajo la locución')
+        parser.add_argument('--replay', metavar='DIR', default=None,
+                            help='Usa los listados grabados en DIR (ver reddit_replay.py) en lugar de Reddit')
         args = parser.parse_args()
+        reddit_fetcher = ReplayRedditFetcher(args.replay) if args.replay else None
+        if args.music:
+            prepare_music(args.render_profile)
         
         # Ejecutar el proceso principal
-        main_bot_process(args.no_upload)
+        main_bot_process(args.no_upload, args.render_profile, args.animated_bg, args.captions, args.branding,
+                         args.max_duration, args.music, reddit_fetcher)
     
     except KeyboardInterrupt:
         print("\n\nProceso interrumpido por el usuario.")
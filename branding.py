@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import subprocess
+from moviepy.config import FFMPEG_BINARY
+from render_profiles import ffmpeg_audio_args, ffmpeg_silence_input, ffmpeg_video_args
+from text_layout import fit_text, render_text_card
+from video_renderer import AlphaLayer, concat_segments, write_still_video
+
+# Versión de los segmentos: cambiarla invalida todos los segmentos en disco
+SEGMENT_VERSION = 1
+
+# Segmentos por defecto. Cada uno puede ser una tarjeta de texto sobre el
+# fondo del tema ("text") o un video propio ("source") que se adapta al formato
+DEFAULT_BRANDING = {
+    "intro": {"text": None, "source": None, "duration": 1.5},
+    "outro": {"text": "Follow for more Reddit stories!", "source": None, "duration": 2.0}
+}
+
+
+class BrandingSegments:
+    """
+    Clase para añadir una entrada y una salida de marca a cada video.
+
+    Los segmentos se codifican una sola vez por combinación de definición,
+    tema y perfil de renderizado, y se guardan en disco. Al crear un video
+    solo se concatenan con el cuerpo copiando los streams, de modo que la
+    marca no añade tiempo de codificación por video.
+
+    Los segmentos se configuran en content_config.json con la clave "branding".
+    """
+    def __init__(self, config=None, cache_dir='branding_cache'):
+        config = (config or {}).get("branding", {})
+        self.segments = {}
+        for kind, defaults in DEFAULT_BRANDING.items():
+            spec = dict(defaults)
+            spec.update(config.get(kind, {}))
+            self.segments[kind] = spec
+        self.cache_dir = cache_dir
+
+    def _is_enabled(self, spec):
+        return bool(spec.get("text") or spec.get("source"))
+
+    def get_duration(self):
+        """Duración de los segmentos activos (los videos propios sin "duration" no cuentan)"""
+        return sum(spec.get("duration") or 0 for spec in self.segments.values() if self._is_enabled(spec))
+
+    def _segment_path(self, kind, spec, profile, theme):
+        """Ruta en caché del segmento: cambia si cambia la definición, el tema o el perfil"""
+        source_mtime = None
+        if spec.get("source") and os.path.exists(spec["source"]):
+            source_mtime = os.path.getmtime(spec["source"])
+        payload = json.dumps({
+            "version": SEGMENT_VERSION,
+            "spec": spec,
+            "source_mtime": source_mtime,
+            "theme": theme.key if spec.get("text") else None,
+            "profile": {k: v for k, v in profile.items() if k != "threads"}
+        }, sort_keys=True)
+        key = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{kind}_{key}.mp4")
+
+    def get_segment(self, kind, profile, theme):
+        """Obtiene la ruta del segmento, codificándolo solo si no está en caché"""
+        spec = self.segments.get(kind)
+        if not spec or not self._is_enabled(spec):
+            return None
+
+        path = self._segment_path(kind, spec, profile, theme)
+        if not os.path.exists(path):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            print(f"Codificando el segmento de marca '{kind}' (solo esta vez)...")
+            # Codificar en un archivo temporal para no dejar segmentos a medias en la caché
+            temp_path = path + '.tmp.mp4'
+            if spec.get("source"):
+                self._encode_source_segment(spec, profile, temp_path)
+            else:
+                self._encode_text_segment(spec, profile, theme, temp_path)
+            os.replace(temp_path, path)
+        return path
+
+    def _encode_text_segment(self, spec, profile, theme, path):
+        """Codifica una tarjeta de texto sobre el fondo del tema, con audio en silencio"""
+        layout = fit_text(spec["text"], fonts=theme.fonts)
+        frame = theme.frame.copy()
+        AlphaLayer(render_text_card(layout, theme.text_color)).blit(frame, 0)
+        write_still_video(frame, None, path, spec["duration"], profile)
+
+    def _encode_source_segment(self, spec, profile, path):
+        """Adapta un video propio al formato, los fps y el audio del perfil"""
+        source = spec["source"]
+        if not os.path.exists(source):
+            raise Exception(f"No se encontró el video de marca {source}")
+
+        # Si el video no tiene audio se añade una pista de silencio
+        probe = subprocess.run([FFMPEG_BINARY, '-hide_banner', '-i', source],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        has_audio = b'Audio:' in probe.stderr
+
+        width, height = 1080, 1920
+        video_filter = (f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps={profile['fps']}")
+        cmd = [FFMPEG_BINARY, '-y', '-loglevel', 'error', '-i', source]
+        if has_audio:
+            cmd += ['-map', '0:v:0', '-map', '0:a:0']
+        else:
+            cmd += ffmpeg_silence_input(profile) + ['-map', '0:v:0', '-map', '1:a', '-shortest']
+        if spec.get("duration"):
+            cmd += ['-t', f'{spec["duration"]:.3f}']
+        cmd += ['-vf', video_filter, *ffmpeg_video_args(profile), *ffmpeg_audio_args(profile),
+                '-movflags', '+faststart', path]
+
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise Exception(f"Error de ffmpeg al codificar el video de marca: {result.stderr.decode('utf-8', 'ignore').strip()}")
+
+    def wrap(self, body_path, output_path, profile, theme):
+        """
+        Une entrada, cuerpo y salida en output_path. Devuelve False si no hay
+        ningún segmento de marca activo (y no se crea output_path).
+        """
+        intro = self.get_segment("intro", profile, theme)
+        outro = self.get_segment("outro", profile, theme)
+        if not intro and not outro:
+            return False
+
+        segments = [path for path in (intro, body_path, outro) if path]
+        concat_segments(segments, output_path)
+        return True
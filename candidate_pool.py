@@ -0,0 +1,345 @@
+import sqlite3
+import threading
+import time
+from content_filter import get_content_filter
+from virality import rank_records
+
+# Segundos que un listado se considera actual, según su filtro de tiempo: el
+# top del día cambia cada pocas horas, el de la semana o el mes mucho menos
+DEFAULT_LISTING_TTL = {
+    "hour": 15 * 60,
+    "day": 2 * 3600,
+    "week": 12 * 3600,
+    "month": 24 * 3600,
+    "year": 3 * 24 * 3600,
+    "all": 7 * 24 * 3600
+}
+
+# Posts que se guardan de cada listado y frecuencia del recolector en segundo plano
+HARVEST_LIMIT = 25
+HARVEST_INTERVAL = 10 * 60
+
+
+class PostRecord:
+    """
+    Copia compacta de los campos de un post que usa el bot.
+
+    Se crea a partir de los datos que ya trae el listado: leer con getattr
+    un campo ausente en un objeto de PRAW lo descarga de nuevo (una petición
+    por post), así que solo se consulta el diccionario del objeto. Los campos
+    que falten se completan después en bloque (ver reddit_fetcher.py).
+    """
+    # Columnas que se guardan en el pool; virality se calcula al elegir candidatos
+    COLUMNS = ('id', 'subreddit', 'title', 'permalink', 'score', 'upvote_ratio', 'num_comments',
+               'created_utc', 'over_18', 'has_url', 'link_flair_text')
+    __slots__ = COLUMNS + ('virality',)
+
+    # Campos que deben venir en el listado; has_url se deduce de la ausencia de la clave
+    REQUIRED_FIELDS = ('id', 'subreddit', 'title', 'permalink', 'score', 'num_comments', 'created_utc',
+                       'over_18')
+
+    def __init__(self, id, subreddit, title, permalink, score=None, upvote_ratio=None, num_comments=None,
+                 created_utc=None, over_18=None, has_url=False, link_flair_text=None):
+        self.id = id
+        self.subreddit = subreddit
+        self.title = title
+        self.permalink = permalink
+        self.score = score
+        self.upvote_ratio = upvote_ratio
+        self.virality = None
+        self.num_comments = num_comments
+        self.created_utc = created_utc
+        self.over_18 = over_18
+        self.has_url = has_url
+        self.link_flair_text = link_flair_text
+
+    @classmethod
+    def from_submission(cls, post):
+        """Crea el registro con los campos ya recibidos de un post de PRAW o asyncpraw"""
+        data = vars(post)
+        subreddit = data.get('subreddit')
+        if subreddit is not None and not isinstance(subreddit, str):
+            subreddit = vars(subreddit).get('display_name')
+        return cls(
+            id=data.get('id'),
+            subreddit=subreddit,
+            title=data.get('title'),
+            permalink=data.get('permalink'),
+            score=data.get('score'),
+            upvote_ratio=data.get('upvote_ratio'),
+            num_comments=data.get('num_comments'),
+            created_utc=data.get('created_utc'),
+            over_18=data.get('over_18'),
+            has_url='url_overridden_by_dest' in data,
+            link_flair_text=data.get('link_flair_text')
+        )
+
+    @classmethod
+    def from_row(cls, row):
+        """Crea el registro desde una fila de la base de datos del pool"""
+        record = cls(**dict(row))
+        record.over_18 = bool(record.over_18)
+        record.has_url = bool(record.has_url)
+        return record
+
+    def missing_fields(self):
+        return [field for field in self.REQUIRED_FIELDS if getattr(self, field) is None]
+
+    def update(self, other):
+        """Completa los campos que faltan con los de otro registro del mismo post"""
+        for field in self.REQUIRED_FIELDS + ('upvote_ratio', 'link_flair_text'):
+            if getattr(self, field) is None:
+                setattr(self, field, getattr(other, field))
+        self.has_url = self.has_url or other.has_url
+
+    def as_dict(self):
+        return {field: getattr(self, field) for field in self.COLUMNS}
+
+
+class CandidatePool:
+    """
+    Pool local de posts candidatos guardado en SQLite.
+
+    Un recolector descarga periódicamente el top de cada subreddit activo y
+    filtro de tiempo, y cada listado se vuelve a descargar solo cuando supera
+    su TTL. get_viral_post elige entre los posts del pool sin ninguna petición
+    a Reddit; si Reddit va lento o falla, se siguen usando los listados
+    guardados aunque hayan caducado.
+    """
+    def __init__(self, db_file='candidate_pool.db', ttl=None, limit=HARVEST_LIMIT):
+        self.db_file = db_file
+        self.ttl = dict(DEFAULT_LISTING_TTL)
+        self.ttl.update(ttl or {})
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._harvester = None
+        self._stop = threading.Event()
+        # La conexión se comparte con el hilo del recolector, protegida por el lock
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._create_tables()
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS posts (
+                    id TEXT PRIMARY KEY,
+                    subreddit TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    permalink TEXT NOT NULL,
+                    score INTEGER,
+                    upvote_ratio REAL,
+                    num_comments INTEGER,
+                    created_utc REAL,
+                    over_18 INTEGER NOT NULL,
+                    has_url INTEGER NOT NULL,
+                    link_flair_text TEXT
+                );
+                CREATE TABLE IF NOT EXISTS listings (
+                    subreddit TEXT NOT NULL,
+                    time_filter TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (subreddit, time_filter)
+                );
+                CREATE TABLE IF NOT EXISTS listing_posts (
+                    subreddit TEXT NOT NULL,
+                    time_filter TEXT NOT NULL,
+                    rank INTEGER NOT NULL,
+                    post_id TEXT NOT NULL,
+                    PRIMARY KEY (subreddit, time_filter, rank)
+                );
+            """)
+            # Pools creados antes de guardar la proporción de votos positivos o el flair
+            columns = [row["name"] for row in self._conn.execute("PRAGMA table_info(posts)")]
+            if "upvote_ratio" not in columns:
+                self._conn.execute("ALTER TABLE posts ADD COLUMN upvote_ratio REAL")
+            if "link_flair_text" not in columns:
+                self._conn.execute("ALTER TABLE posts ADD COLUMN link_flair_text TEXT")
+            # Pools creados antes de guardar los listados en minúsculas: se
+            # descartan esos listados (el recolector los vuelve a descargar)
+            self._conn.execute("DELETE FROM listing_posts WHERE subreddit != lower(subreddit)")
+            self._conn.execute("DELETE FROM listings WHERE subreddit != lower(subreddit)")
+            self._conn.execute("DELETE FROM posts WHERE id NOT IN (SELECT post_id FROM listing_posts)")
+
+    @staticmethod
+    def listing_key(subreddit):
+        """
+        Nombre con el que se guarda el subreddit de un listado: Reddit no
+        distingue mayúsculas ("AskReddit" y "askreddit" son el mismo listado)
+        """
+        return subreddit.lower()
+
+    def has_listing(self, subreddit, time_filter):
+        """Comprueba si el pool tiene algún listado (actual o caducado) de ese subreddit y filtro"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM listings WHERE subreddit = ? AND time_filter = ?",
+                (self.listing_key(subreddit), time_filter)).fetchone()
+        return row is not None
+
+    def is_stale(self, subreddit, time_filter):
+        """Comprueba si un listado falta en el pool o ya superó su TTL"""
+        return bool(self.stale_listings([subreddit], [time_filter]))
+
+    def stale_listings(self, subreddits, time_filters, now=None):
+        """Listados que faltan en el pool o que ya superaron su TTL"""
+        now = now or time.time()
+        with self._lock:
+            fetched = {(row["subreddit"], row["time_filter"]): row["fetched_at"]
+                       for row in self._conn.execute("SELECT subreddit, time_filter, fetched_at FROM listings")}
+        stale = []
+        for subreddit in subreddits:
+            for time_filter in time_filters:
+                fetched_at = fetched.get((self.listing_key(subreddit), time_filter))
+                if fetched_at is None or now - fetched_at > self.ttl.get(time_filter, self.ttl["day"]):
+                    stale.append((subreddit, time_filter))
+        return stale
+
+    def store_listing(self, subreddit, time_filter, records):
+        """Sustituye un listado por los posts descargados (PostRecord), en orden de ranking"""
+        rows = [record.as_dict() for record in records]
+        key = self.listing_key(subreddit)
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT OR REPLACE INTO posts
+                    (id, subreddit, title, permalink, score, upvote_ratio, num_comments, created_utc, over_18, has_url,
+                     link_flair_text)
+                VALUES
+                    (:id, :subreddit, :title, :permalink, :score, :upvote_ratio, :num_comments, :created_utc,
+                     :over_18, :has_url, :link_flair_text)
+            """, rows)
+            self._conn.execute("DELETE FROM listing_posts WHERE subreddit = ? AND time_filter = ?",
+                               (key, time_filter))
+            self._conn.executemany(
+                "INSERT INTO listing_posts (subreddit, time_filter, rank, post_id) VALUES (?, ?, ?, ?)",
+                [(key, time_filter, rank, row["id"]) for rank, row in enumerate(rows)])
+            self._conn.execute("INSERT OR REPLACE INTO listings (subreddit, time_filter, fetched_at) VALUES (?, ?, ?)",
+                               (key, time_filter, time.time()))
+            # Eliminar los posts que ya no aparecen en ningún listado
+            self._conn.execute("DELETE FROM posts WHERE id NOT IN (SELECT post_id FROM listing_posts)")
+
+    def harvest(self, fetcher, subreddits, time_filters, force=False):
+        """
+        Descarga a la vez los listados que faltan o han caducado (todos con
+        force=True) con un descargador de reddit_fetcher.py. Un error en un
+        listado no impide actualizar los demás.
+
+        Returns:
+            int: Número de listados actualizados
+        """
+        listings = [(s, t) for s in subreddits for t in time_filters] if force else \
+            self.stale_listings(subreddits, time_filters)
+        if not listings:
+            return 0
+        refreshed = 0
+        for (subreddit, time_filter), records in fetcher.fetch_listings(listings, self.limit).items():
+            if isinstance(records, Exception):
+                print(f"Error al actualizar el listado de r/{subreddit} ({time_filter}): {str(records)}")
+                continue
+            self.store_listing(subreddit, time_filter, records)
+            refreshed += 1
+        return refreshed
+
+    def get_candidates(self, subreddit, time_filter, is_used=None, limit=5, max_scan=None, allow_links=None,
+                       is_duplicate=None, content_filter=None):
+        """
+        Mejores posts candidatos (PostRecord) de un listado según su
+        viralidad (ver virality.py), entre los que pasan el filtro de
+        contenido (ver content_filter.py) y no se han usado ya.
+
+        Args:
+            is_used: Función que indica si un id de post ya se ha usado
+            limit: Número máximo de candidatos
+            max_scan: Número máximo de posts del listado (por orden del listado) que se examinan
+            allow_links: True para admitir posts con URL externa aunque el filtro no lo haga
+            is_duplicate: Función que indica si un título es casi idéntico al de un post ya usado
+            content_filter: Filtro de contenido (por defecto, el compartido del proceso)
+        """
+        return self._select([(subreddit, time_filter)], limit, max_scan,
+                            dict(allow_links=allow_links, is_used=is_used, is_duplicate=is_duplicate),
+                            content_filter)
+
+    def get_top_candidates(self, subreddits, time_filters, is_used=None, limit=5, allow_links=None,
+                           is_duplicate=None, content_filter=None):
+        """
+        Mejores posts candidatos de todos los listados guardados de esos
+        subreddits y filtros de tiempo, puntuados juntos en una sola pasada.
+        """
+        listings = [(s, t) for s in subreddits for t in time_filters]
+        return self._select(listings, limit, None,
+                            dict(allow_links=allow_links, is_used=is_used, is_duplicate=is_duplicate),
+                            content_filter)
+
+    def _select(self, listings, limit, max_scan, filter_args, content_filter=None):
+        if not listings:
+            return []
+        listings = list(dict.fromkeys((self.listing_key(s), t) for s, t in listings))
+        listing_clause = " OR ".join(["(lp.subreddit = ? AND lp.time_filter = ?)"] * len(listings))
+        query = f"""
+            SELECT DISTINCT p.* FROM listing_posts lp JOIN posts p ON p.id = lp.post_id
+            WHERE ({listing_clause})
+        """
+        params = [value for listing in listings for value in listing]
+        if max_scan is not None:
+            query += " AND lp.rank < ?"
+            params.append(max_scan)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        content_filter = content_filter or get_content_filter()
+        candidates = content_filter.filter([PostRecord.from_row(row) for row in rows], **filter_args)
+        return rank_records(candidates)[:limit]
+
+    def get_stats(self):
+        """Número de listados y posts en el pool"""
+        with self._lock:
+            listings = self._conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0]
+            posts = self._conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+        return {"listings": listings, "posts": posts}
+
+    def start_harvester(self, fetcher, config_loader, interval=HARVEST_INTERVAL):
+        """
+        Inicia un hilo que mantiene el pool actualizado cada `interval`
+        segundos con los subreddits activos y filtros de tiempo de la
+        configuración devuelta por config_loader.
+        """
+        if self._harvester is not None and self._harvester.is_alive():
+            return
+
+        def run():
+            while not self._stop.is_set():
+                try:
+                    # Mantener el token de Reddit vigente aunque no haya listados caducados
+                    fetcher.keep_alive()
+                    config = config_loader()
+                    refreshed = self.harvest(fetcher, config["active_subreddits"], config["time_filters"])
+                    if refreshed:
+                        stats = self.get_stats()
+                        print(f"Pool de candidatos actualizado: {refreshed} listados "
+                              f"({stats['posts']} posts en total)")
+                except Exception as e:
+                    print(f"Error en el recolector de posts: {str(e)}")
+                self._stop.wait(interval)
+
+        self._stop.clear()
+        self._harvester = threading.Thread(target=run, name='candidate-harvester', daemon=True)
+        self._harvester.start()
+
+    def is_harvesting(self):
+        """Comprueba si el recolector en segundo plano está en marcha"""
+        return self._harvester is not None and self._harvester.is_alive() and not self._stop.is_set()
+
+    def stop_harvester(self):
+        """Detiene el recolector en segundo plano"""
+        self._stop.set()
+
+
+_pool = None
+
+
+def get_candidate_pool():
+    """Obtiene el pool de candidatos compartido por todo el proceso"""
+    global _pool
+    if _pool is None:
+        _pool = CandidatePool()
+    return _pool
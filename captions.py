@@ -0,0 +1,138 @@
+from bisect import bisect_right
+from functools import lru_cache
+import numpy as np
+from PIL import Image, ImageDraw
+from text_layout import FONT_CANDIDATES, get_font, get_line_height, measure_word
+from video_renderer import AlphaLayer
+
+# Colores del texto normal y de la palabra que se está pronunciando
+CAPTION_COLOR = (255, 255, 255)
+HIGHLIGHT_COLOR = (255, 214, 0)
+SHADOW_OFFSET = 3
+
+# Duración de cada ventana al analizar la envolvente del audio
+ENVELOPE_WINDOW = 0.02
+
+
+@lru_cache(maxsize=4096)
+def rasterize_word(word, font_size, fill=CAPTION_COLOR, fonts=FONT_CANDIDATES):
+    """
+    Dibuja una palabra con sombra en una imagen RGBA ajustada a su tamaño.
+    Se cachea por (palabra, tamaño, color, fuentes) para no volver a dibujarla nunca.
+
+    Returns:
+        tuple: (array RGBA, margen izquierdo, alto) para posicionar la palabra
+    """
+    font = get_font(font_size, fonts)
+    pad = SHADOW_OFFSET + 2
+    width = int(measure_word(font_size, word, fonts)) + 2 * pad
+    height = get_line_height(font_size, fonts) + 2 * pad
+
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.text((pad + SHADOW_OFFSET, height / 2 + SHADOW_OFFSET), word, fill="black", anchor="lm", font=font)
+    draw.text((pad, height / 2), word, fill=fill, anchor="lm", font=font)
+
+    rgba = np.array(img)
+    rgba.setflags(write=False)
+    return rgba, pad, height
+
+
+def render_caption_card(layout, size=(1080, 1920), center=(540, 960), fill=CAPTION_COLOR):
+    """Compone en una imagen RGBA todo el texto, palabra a palabra, con las posiciones de la maqueta"""
+    card = np.zeros((size[1], size[0], 4), dtype=np.uint8)
+    for word, x, y in layout.word_positions(*center):
+        rgba, pad, height = rasterize_word(word, layout.font_size, tuple(fill), layout.fonts)
+        left, top = int(round(x)) - pad, int(round(y - height / 2))
+        _paste_rgba(card, rgba, left, top)
+    return card
+
+
+def _paste_rgba(canvas, rgba, left, top):
+    """Pega una imagen RGBA sobre otra RGBA (operador 'over'), recortando en los bordes"""
+    height, width = rgba.shape[:2]
+    canvas_h, canvas_w = canvas.shape[:2]
+    x0, y0 = max(left, 0), max(top, 0)
+    x1, y1 = min(left + width, canvas_w), min(top + height, canvas_h)
+    if x0 >= x1 or y0 >= y1:
+        return
+
+    src = rgba[y0 - top:y1 - top, x0 - left:x1 - left].astype(np.float32) / 255
+    dst = canvas[y0:y1, x0:x1].astype(np.float32) / 255
+    src_a, dst_a = src[:, :, 3:4], dst[:, :, 3:4]
+    out_a = src_a + dst_a * (1 - src_a)
+    out_rgb = (src[:, :, :3] * src_a + dst[:, :, :3] * dst_a * (1 - src_a)) / np.maximum(out_a, 1e-6)
+    canvas[y0:y1, x0:x1, :3] = (out_rgb * 255).round().astype(np.uint8)
+    canvas[y0:y1, x0:x1, 3:4] = (out_a * 255).round().astype(np.uint8)
+
+
+def _speech_bounds(audio_clip, duration):
+    """Localiza el inicio y el final de la voz a partir de la envolvente RMS del audio"""
+    # Se decodifica a la frecuencia nativa: to_soundarray no remuestrea bien
+    fps = audio_clip.fps
+    try:
+        samples = audio_clip.to_soundarray(fps=fps)
+    except Exception as e:
+        print(f"No se pudo analizar el audio para los subtítulos: {str(e)}")
+        return 0.0, duration
+
+    if samples.ndim > 1:
+        samples = samples.mean(axis=1)
+    window = int(fps * ENVELOPE_WINDOW)
+    n_windows = len(samples) // window
+    if n_windows == 0:
+        return 0.0, duration
+
+    frames = samples[:n_windows * window].reshape(n_windows, window)
+    rms = np.sqrt((frames ** 2).mean(axis=1))
+    voiced = np.flatnonzero(rms > rms.max() * 0.1)
+    if voiced.size == 0:
+        return 0.0, duration
+    return voiced[0] * ENVELOPE_WINDOW, min(duration, (voiced[-1] + 1) * ENVELOPE_WINDOW)
+
+
+def estimate_word_timings(words, audio_clip, duration):
+    """
+    Estima el intervalo (inicio, fin) en que se pronuncia cada palabra.
+
+    El tiempo de voz detectado en el audio se reparte proporcionalmente a la
+    longitud de cada palabra, con una pausa extra tras los signos de puntuación.
+    """
+    if not words:
+        return []
+
+    speech_start, speech_end = _speech_bounds(audio_clip, duration)
+    weights = np.array([len(word) + 2 + (4 if word[-1] in '.,;:!?' else 0) for word in words], dtype=np.float64)
+    edges = speech_start + np.concatenate([[0], np.cumsum(weights)]) / weights.sum() * (speech_end - speech_start)
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+class CaptionLayer:
+    """
+    Capa de subtítulos tipo karaoke para StreamRenderer: resalta la palabra
+    que se está pronunciando mezclando su versión resaltada, rasterizada una
+    sola vez, sobre el texto base.
+    """
+    def __init__(self, layout, timings, center=(540, 960), highlight=HIGHLIGHT_COLOR, size=(1080, 1920)):
+        self.starts = [start for start, _ in timings]
+        self.ends = [end for _, end in timings]
+        self.word_layers = []
+        for word, x, y in layout.word_positions(*center):
+            rgba, pad, height = rasterize_word(word, layout.font_size, tuple(highlight), layout.fonts)
+            position = (int(round(x)) - pad, int(round(y - height / 2)))
+            self.word_layers.append(AlphaLayer(rgba, position, size))
+
+    def active_word(self, t):
+        """Índice de la palabra que se pronuncia en el instante t, o None"""
+        index = bisect_right(self.starts, t) - 1
+        if 0 <= index < len(self.word_layers) and t < self.ends[index]:
+            return index
+        return None
+
+    def state(self, t):
+        return self.active_word(t)
+
+    def blit(self, buffer, t):
+        index = self.active_word(t)
+        if index is not None:
+            self.word_layers[index].blit(buffer, t)
@@ -3,6 +3,7 @@ import praw
 import json
 import os
 from datetime import datetime
+from content_filter import DEFAULT_FILTERS
 
 class ContentDiversifier:
     """
@@ -64,6 +65,7 @@ class ContentDiversifier:
             "time_filters": ["day", "week"],
             "time_filter_weights": {"day": 70, "week": 30},
             "post_count": 5,  # Número de posts a obtener para seleccionar el mejor
+            "filters": DEFAULT_FILTERS,  # Reglas de contenido de los candidatos (ver content_filter.py)
             "last_updated": datetime.now().isoformat()
         }
     
@@ -131,11 +133,25 @@ class ContentDiversifier:
         
         return random.choice(weighted_list)
     
+    def get_categories(self, subreddit):
+        """
+        Obtiene los tipos de contenido de un subreddit (sin distinguir
+        mayúsculas). Los subreddits que no están en SUBREDDIT_CATEGORIES
+        pueden declararse en la clave "subreddit_categories" de la configuración.
+        """
+        categories = dict(self.SUBREDDIT_CATEGORIES)
+        categories.update(self.config.get("subreddit_categories", {}))
+        for name, values in categories.items():
+            if name.lower() == (subreddit or '').lower():
+                return list(values)
+        return []
+    
     def get_post_tags(self, subreddit):
         """Obtiene etiquetas relevantes para un subreddit específico"""
-        if subreddit in self.SUBREDDIT_CATEGORIES:
+        categories = self.get_categories(subreddit)
+        if categories:
             # Combinar etiquetas específicas con generales
-            tags = self.SUBREDDIT_CATEGORIES[subreddit] + ["shorts", "viral", "reddit"]
+            tags = categories + ["shorts", "viral", "reddit"]
             # Agregar el nombre del subreddit como etiqueta
             tags.append(subreddit.lower())
             return tags
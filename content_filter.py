@@ -0,0 +1,166 @@
+import re
+import threading
+
+# Configuración predeterminada de la clave "filters" de content_config.json
+DEFAULT_FILTERS = {
+    "min_title_length": 15,
+    "max_title_length": 250,
+    "allow_nsfw": False,
+    "allow_links": False,
+    "blocked_terms": [],
+    "blocked_flairs": [],
+    "allowed_flairs": [],
+    "subreddit_overrides": {}
+}
+
+# Listas que en subreddit_overrides se suman a las generales en lugar de sustituirlas
+ADDITIVE_KEYS = ("blocked_terms", "blocked_flairs")
+
+
+def compile_terms(terms):
+    """
+    Compila los términos bloqueados en una sola expresión regular, de modo
+    que cada título se recorre una sola vez sea cual sea el número de
+    términos. Coinciden palabras o frases completas, sin distinguir
+    mayúsculas. Devuelve None si no hay términos.
+    """
+    terms = sorted({term.strip().lower() for term in terms if term.strip()}, key=len, reverse=True)
+    if not terms:
+        return None
+    alternatives = "|".join(re.escape(term) for term in terms)
+    return re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)", re.IGNORECASE)
+
+
+class ContentFilter:
+    """
+    Reglas de contenido que deben cumplir los posts candidatos, configuradas
+    en la clave "filters" de content_config.json (con excepciones por
+    subreddit en "subreddit_overrides").
+
+    Las reglas de cada subreddit se compilan una sola vez y se evalúan de la
+    más barata a la más cara, deteniéndose en la primera que rechaza el post.
+    Los rechazos se cuentan por regla para saber cuál descarta más candidatos.
+    """
+    def __init__(self, config=None):
+        self.config = None
+        self.stats = {"checked": 0, "accepted": 0, "rejected": {}}
+        self._lock = threading.Lock()
+        self.configure(config)
+
+    def configure(self, config):
+        """Aplica una configuración de filtros; los contadores se conservan"""
+        settings = dict(DEFAULT_FILTERS)
+        settings.update(config or {})
+        if settings == self.config:
+            return
+        self.config = settings
+        self._overrides = {name.lower(): values for name, values in settings["subreddit_overrides"].items()}
+        self._compiled = {}
+
+    def settings_for(self, subreddit):
+        """Configuración efectiva de un subreddit, con sus excepciones aplicadas"""
+        settings = dict(self.config)
+        for key, value in self._overrides.get((subreddit or '').lower(), {}).items():
+            settings[key] = settings.get(key, []) + value if key in ADDITIVE_KEYS else value
+        return settings
+
+    def _compile(self, subreddit, allow_links):
+        settings = self.settings_for(subreddit)
+        # Cada regla devuelve True si rechaza el post; van de la más barata a la más cara
+        rules = []
+        if not (allow_links or settings["allow_links"]):
+            rules.append(("links", lambda post: post.has_url))
+        if not settings["allow_nsfw"]:
+            rules.append(("nsfw", lambda post: post.over_18))
+
+        blocked_flairs = {flair.lower() for flair in settings["blocked_flairs"]}
+        allowed_flairs = {flair.lower() for flair in settings["allowed_flairs"]}
+        if blocked_flairs or allowed_flairs:
+            def rejects_flair(post):
+                flair = (post.link_flair_text or '').lower()
+                return flair in blocked_flairs or bool(allowed_flairs) and flair not in allowed_flairs
+            rules.append(("flair", rejects_flair))
+
+        min_length, max_length = settings["min_title_length"], settings["max_title_length"]
+        rules.append(("title_length", lambda post: not min_length <= len(post.title) <= max_length))
+
+        pattern = compile_terms(settings["blocked_terms"])
+        if pattern is not None:
+            rules.append(("blocked_terms", lambda post: pattern.search(post.title) is not None))
+        return rules
+
+    def filter(self, records, allow_links=None, is_used=None, is_duplicate=None):
+        """
+        Posts (PostRecord) que pasan todas las reglas, en el mismo orden.
+
+        Args:
+            allow_links: True para admitir posts con URL externa aunque la configuración no lo haga
+            is_used: Función que indica si un id de post ya se ha usado
+            is_duplicate: Función que indica si un título es casi idéntico al de un post ya usado
+        """
+        # Las comprobaciones del historial son las más caras y van al final
+        history_rules = []
+        if is_used is not None:
+            history_rules.append(("used", lambda post: is_used(post.id)))
+        if is_duplicate is not None:
+            history_rules.append(("duplicate_title", lambda post: is_duplicate(post.title)))
+
+        rules_by_subreddit = {}
+        rejected = {}
+        accepted = []
+        for record in records:
+            key = (record.subreddit or '').lower()
+            rules = rules_by_subreddit.get(key)
+            if rules is None:
+                compiled_key = (key, bool(allow_links))
+                if compiled_key not in self._compiled:
+                    self._compiled[compiled_key] = self._compile(record.subreddit, allow_links)
+                rules = rules_by_subreddit[key] = self._compiled[compiled_key] + history_rules
+
+            for name, rejects in rules:
+                if rejects(record):
+                    rejected[name] = rejected.get(name, 0) + 1
+                    break
+            else:
+                accepted.append(record)
+
+        with self._lock:
+            self.stats["checked"] += len(records)
+            self.stats["accepted"] += len(accepted)
+            for name, count in rejected.items():
+                self.stats["rejected"][name] = self.stats["rejected"].get(name, 0) + count
+        return accepted
+
+    def get_stats(self):
+        """Posts evaluados, aceptados y rechazados por cada regla (de más a menos rechazos)"""
+        with self._lock:
+            rejected = sorted(self.stats["rejected"].items(), key=lambda item: item[1], reverse=True)
+            return {"checked": self.stats["checked"], "accepted": self.stats["accepted"],
+                    "rejected": dict(rejected)}
+
+    def get_stats_since(self, previous):
+        """Diferencia entre las estadísticas actuales y unas anteriores de get_stats()"""
+        current = self.get_stats()
+        rejected = {name: count - previous["rejected"].get(name, 0) for name, count in current["rejected"].items()}
+        return {"checked": current["checked"] - previous["checked"],
+                "accepted": current["accepted"] - previous["accepted"],
+                "rejected": {name: count for name, count in rejected.items() if count}}
+
+
+_content_filter = None
+_content_filter_lock = threading.Lock()
+
+
+def get_content_filter(config=None):
+    """
+    Obtiene el filtro de contenido compartido por todo el proceso (los
+    contadores se acumulan entre ciclos). Si se pasa una configuración, se
+    aplica cuando ha cambiado.
+    """
+    global _content_filter
+    with _content_filter_lock:
+        if _content_filter is None:
+            _content_filter = ContentFilter(config)
+        elif config is not None:
+            _content_filter.configure(config)
+        return _content_filter
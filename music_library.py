@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import random
+import numpy as np
+from audio_processing import FRAME_DURATION, PEAK_LIMIT_DB, SILENCE_THRESHOLD_DB, decode_pcm, frame_levels, loudness_gain
+
+# Versión del formato en caché: cambiarla obliga a decodificar de nuevo las pistas
+MUSIC_CACHE_VERSION = 1
+
+MUSIC_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.m4a', '.flac', '.aac')
+
+# Configuración por defecto de la música de fondo. Los volúmenes son relativos
+# a la voz: volume_db bajo la voz en los silencios y duck_db adicionales
+# mientras se habla. attack y release son los segundos que la música tarda
+# en bajar antes de que empiece la voz y en recuperarse después.
+DEFAULT_MUSIC = {
+    "directory": "music",
+    "tracks": None,
+    "volume_db": -14.0,
+    "duck_db": -10.0,
+    "attack": 0.1,
+    "release": 0.4,
+    "fade": 1.0
+}
+
+
+class MusicLibrary:
+    """
+    Clase para mezclar música de fondo bajo la locución.
+
+    Cada pista se decodifica una sola vez a PCM de 16 bits en el formato de
+    audio del perfil, con el volumen ya normalizado, y se guarda en disco.
+    Al mezclar, la pista se abre con memoria mapeada (sin leerla entera ni
+    volver a decodificarla) y solo se copia el tramo que necesita el video.
+    Los archivos mapeados se conservan entre videos del mismo proceso.
+
+    La música se configura en content_config.json con la clave "music".
+    """
+    def __init__(self, config=None, cache_dir='music_cache'):
+        self.settings = dict(DEFAULT_MUSIC)
+        self.settings.update((config or {}).get("music", {}))
+        self.cache_dir = cache_dir
+        self._maps = {}
+
+    def get_tracks(self):
+        """Lista de pistas disponibles (las de "tracks" o todas las del directorio)"""
+        directory = self.settings["directory"]
+        if self.settings["tracks"]:
+            tracks = [os.path.join(directory, track) for track in self.settings["tracks"]]
+        elif os.path.isdir(directory):
+            tracks = [os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                      if name.lower().endswith(MUSIC_EXTENSIONS)]
+        else:
+            tracks = []
+        return [track for track in tracks if os.path.exists(track)]
+
+    def _cache_path(self, track, rate, channels):
+        """Ruta del PCM en caché: cambia si cambia el archivo o el formato de audio"""
+        payload = json.dumps({
+            "version": MUSIC_CACHE_VERSION,
+            "track": os.path.abspath(track),
+            "mtime": os.path.getmtime(track),
+            "size": os.path.getsize(track),
+            "rate": rate,
+            "channels": channels
+        }, sort_keys=True)
+        key = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(track))[0]
+        return os.path.join(self.cache_dir, f"{name}_{key}_{rate}x{channels}.pcm")
+
+    def _decode(self, track, rate, channels, path):
+        """Decodifica la pista, normaliza su volumen y la guarda como PCM crudo"""
+        print(f"Decodificando la pista de música {os.path.basename(track)} (solo esta vez)...")
+        pcm = decode_pcm(track, rate, channels).reshape(-1, channels)
+        samples = pcm.astype(np.float32) / 32768.0
+        samples *= loudness_gain(samples, rate)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Escribir en un archivo temporal para no dejar pistas a medias en la caché
+        temp_path = path + '.tmp'
+        np.clip(samples * 32768.0, -32768, 32767).astype(np.int16).tofile(temp_path)
+        os.replace(temp_path, path)
+
+    def load(self, track, rate, channels):
+        """Pista decodificada como array (muestras, canales) mapeado en memoria"""
+        path = self._cache_path(track, rate, channels)
+        if path not in self._maps:
+            if not os.path.exists(path):
+                self._decode(track, rate, channels, path)
+            self._maps[path] = np.memmap(path, dtype=np.int16, mode='r').reshape(-1, channels)
+        return self._maps[path]
+
+    def prepare(self, profile):
+        """
+        Decodifica de antemano todas las pistas en el formato de audio del
+        perfil, para que ningún video tenga que esperar a decodificarlas.
+
+        Returns:
+            int: Número de pistas preparadas
+        """
+        prepared = 0
+        for track in self.get_tracks():
+            try:
+                self.load(track, profile["audio_rate"], profile["audio_channels"])
+                prepared += 1
+            except Exception as e:
+                print(f"No se pudo preparar la pista de música {os.path.basename(track)}: {str(e)}")
+        return prepared
+
+    def duck_curve(self, speech, speech_rate, length, rate):
+        """
+        Ganancia lineal de la música para cada muestra de salida: volume_db
+        de base, duck_db más mientras hay voz (adelantado attack segundos y
+        mantenido release segundos) y fundidos al principio y al final.
+        """
+        levels, _ = frame_levels(speech, speech_rate)
+        active = (levels > SILENCE_THRESHOLD_DB).astype(np.float32)
+        if len(active):
+            # Extender cada ventana con voz hacia atrás (attack) y hacia delante (release)
+            lead = int(self.settings["attack"] / FRAME_DURATION)
+            hold = int(self.settings["release"] / FRAME_DURATION)
+            active = np.convolve(active, np.ones(lead + hold + 1), mode='full')[lead:lead + len(active)] > 0
+            # Suavizar las transiciones con una rampa de la duración de attack
+            ramp = np.ones(max(1, lead)) / max(1, lead)
+            ducking = np.convolve(active.astype(np.float32), ramp, mode='same')
+            frame_times = (np.arange(len(active)) + 0.5) * FRAME_DURATION
+            ducking = np.interp(np.arange(length) / rate, frame_times, ducking)
+        else:
+            ducking = np.zeros(length, dtype=np.float32)
+
+        gain = 10 ** ((self.settings["volume_db"] + self.settings["duck_db"] * ducking) / 20)
+
+        fade = min(int(self.settings["fade"] * rate), length // 2)
+        if fade:
+            ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+            gain[:fade] *= ramp
+            gain[-fade:] *= ramp[::-1]
+        return gain.astype(np.float32)
+
+    def mix(self, speech, speech_rate, profile, track=None):
+        """
+        Mezcla la voz (mono, en float) con una pista de música en el formato
+        de audio del perfil. Devuelve un array (muestras, canales) en float, o
+        None si no hay ninguna pista disponible.
+        """
+        if track is None:
+            tracks = self.get_tracks()
+            if not tracks:
+                print(f"No hay pistas de música en {self.settings['directory']}, se omite la música de fondo")
+                return None
+            track = random.choice(tracks)
+        rate, channels = profile["audio_rate"], profile["audio_channels"]
+
+        # Voz remuestreada a la frecuencia del perfil
+        length = int(round(len(speech) * rate / speech_rate))
+        voice = np.interp(np.arange(length) * (speech_rate / rate), np.arange(len(speech)), speech)
+
+        # Tramo de la pista desde un punto aleatorio (repetida si es más corta que la voz)
+        bed = self.load(track, rate, channels)
+        if len(bed) >= length:
+            start = random.randint(0, len(bed) - length)
+            segment = bed[start:start + length]
+        else:
+            segment = np.resize(bed, (length, channels))
+
+        mixed = segment.astype(np.float32)
+        mixed *= self.duck_curve(speech, speech_rate, length, rate)[:, None] / 32768.0
+        mixed += voice[:, None].astype(np.float32)
+
+        # La suma puede superar el límite de pico de la voz: bajar toda la mezcla
+        peak = np.max(np.abs(mixed)) if length else 0.0
+        peak_limit = 10 ** (PEAK_LIMIT_DB / 20)
+        if peak > peak_limit:
+            mixed *= peak_limit / peak
+        print(f"Música de fondo: {os.path.basename(track)}")
+        return mixed
+
+
+_library = None
+
+
+def get_music_library(config=None):
+    """
+    Obtiene la biblioteca de música compartida por todo el proceso, de modo
+    que las pistas mapeadas en memoria se reutilizan entre ciclos.
+    """
+    global _library
+    if _library is None:
+        _library = MusicLibrary(config)
+    return _library
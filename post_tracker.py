@@ -1,14 +1,36 @@
 import json
 import os
 from datetime import datetime
+from title_index import TitleIndex, simhash
+
+# Posts del diario que se acumulan antes de volcarlos en el historial completo,
+# como mínimo COMPACT_EVERY y como máximo una fracción COMPACT_RATIO del
+# historial: así reescribirlo cuesta, repartido entre los posts, lo mismo
+# aunque el historial crezca
+COMPACT_EVERY = 500
+COMPACT_RATIO = 0.25
+
 
 class PostTracker:
     """
     Clase para hacer seguimiento de los posts ya utilizados y evitar duplicados.
+
+    El historial completo (posts_history.json) solo se reescribe de vez en
+    cuando: cada post nuevo se añade como una línea a un diario
+    (posts_history.jsonl), que se vuelca en el historial al acumular
+    COMPACT_EVERY posts. Los ids usados se guardan también en un conjunto,
+    así que comprobar o añadir un post no depende del tamaño del historial.
     """
-    def __init__(self, history_file='posts_history.json'):
+    def __init__(self, history_file='posts_history.json', compact_every=COMPACT_EVERY):
         self.history_file = history_file
+        self.journal_file = os.path.splitext(history_file)[0] + '.jsonl'
+        self.compact_every = compact_every
         self.posts_history = self._load_history()
+        self.used_posts = set(self.posts_history["posts"])
+        self.journal_entries, truncated = self._replay_journal()
+        self.title_index, backfilled = self._build_title_index()
+        if truncated or backfilled or self._needs_compaction():
+            self.compact()
 
     def _load_history(self):
         """Carga el historial de posts desde el archivo"""
@@ -22,36 +44,109 @@ class PostTracker:
         else:
             return {"posts": [], "subreddits": {}}
 
+    def _replay_journal(self):
+        """
+        Aplica al historial los posts del diario que aún no se han volcado en él.
+
+        Returns:
+            tuple: (posts leídos, True si alguna línea estaba incompleta)
+        """
+        if not os.path.exists(self.journal_file):
+            return 0, False
+        entries = 0
+        truncated = False
+        with open(self.journal_file, 'r') as f:
+            for line in f:
+                try:
+                    post_data = json.loads(line)
+                except json.JSONDecodeError:
+                    # Última línea a medio escribir si el proceso se interrumpió
+                    print(f"Se ignora una línea incompleta de {self.journal_file}")
+                    truncated = True
+                    continue
+                entries += 1
+                self._apply(post_data.pop("subreddit"), post_data)
+        return entries, truncated
+
+    def _apply(self, subreddit, post_data):
+        """Añade un post al historial en memoria (False si ya estaba)"""
+        if post_data["id"] in self.used_posts:
+            return False
+        self.used_posts.add(post_data["id"])
+        self.posts_history["posts"].append(post_data["id"])
+        self.posts_history["subreddits"].setdefault(subreddit, []).append(post_data)
+        return True
+
     def _save_history(self):
         """Guarda el historial de posts en el archivo"""
-        with open(self.history_file, 'w') as f:
-            json.dump(self.posts_history, f, indent=2)
+        # Escribir a un archivo temporal y sustituir: el historial nunca queda a medias
+        with open(self.history_file + '.tmp', 'w') as f:
+            json.dump(self.posts_history, f, separators=(',', ':'))
+        os.replace(self.history_file + '.tmp', self.history_file)
+
+    def _needs_compaction(self):
+        threshold = max(self.compact_every, COMPACT_RATIO * len(self.posts_history["posts"]))
+        return self.journal_entries >= threshold
+
+    def compact(self):
+        """Vuelca el diario en el historial completo y lo vacía"""
+        self._save_history()
+        # Si el proceso se interrumpe antes de vaciar el diario, al cargarlo
+        # de nuevo sus posts ya están en el historial y se ignoran
+        if os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+        self.journal_entries = 0
+
+    def _build_title_index(self):
+        """
+        Construye el índice de títulos usados. Las huellas se guardan en el
+        historial; las de los posts antiguos se calculan una vez y se guardan.
+
+        Returns:
+            tuple: (índice, número de huellas calculadas que hay que guardar)
+        """
+        index = TitleIndex()
+        missing = 0
+        for posts in self.posts_history["subreddits"].values():
+            for post in posts:
+                if "simhash" not in post:
+                    post["simhash"] = f"{simhash(post.get('title') or ''):016x}"
+                    missing += 1
+                index.add(post["id"], int(post["simhash"], 16))
+        return index, missing
 
     def is_post_used(self, post_id):
         """Verifica si un post ya ha sido utilizado"""
-        return post_id in self.posts_history["posts"]
+        return post_id in self.used_posts
+
+    def is_duplicate_title(self, title):
+        """Verifica si ya se ha utilizado un post con un título casi idéntico"""
+        return self.title_index.find_title(title) is not None
 
     def add_post(self, post_id, subreddit, title, url=None):
         """Añade un post al historial"""
-        if post_id not in self.posts_history["posts"]:
-            self.posts_history["posts"].append(post_id)
-            
-            # Registrar también en el historial por subreddit
-            if subreddit not in self.posts_history["subreddits"]:
-                self.posts_history["subreddits"][subreddit] = []
-            
-            # Añadir detalles del post
-            post_data = {
-                "id": post_id,
-                "title": title,
-                "url": url,
-                "date_used": datetime.now().isoformat()
-            }
-            
-            self.posts_history["subreddits"][subreddit].append(post_data)
-            self._save_history()
-            return True
-        return False
+        if post_id in self.used_posts:
+            return False
+        
+        # Añadir detalles del post
+        fingerprint = simhash(title or '')
+        post_data = {
+            "id": post_id,
+            "title": title,
+            "url": url,
+            "date_used": datetime.now().isoformat(),
+            "simhash": f"{fingerprint:016x}"
+        }
+        self._apply(subreddit, post_data)
+        self.title_index.add(post_id, fingerprint)
+        
+        # Guardar solo el post nuevo al final del diario
+        with open(self.journal_file, 'a') as f:
+            f.write(json.dumps({"subreddit": subreddit, **post_data}) + '\n')
+        self.journal_entries += 1
+        if self._needs_compaction():
+            self.compact()
+        return True
 
     def get_subreddit_stats(self):
         """Obtiene estadísticas de uso por subreddit"""
@@ -63,3 +158,17 @@ class PostTracker:
     def get_total_posts_used(self):
         """Obtiene el número total de posts utilizados"""
         return len(self.posts_history["posts"])
+
+
+_tracker = None
+
+
+def get_post_tracker():
+    """
+    Obtiene el historial de posts compartido por todo el proceso: se carga
+    una sola vez y los ciclos siguientes (modo continuo) lo reutilizan.
+    """
+    global _tracker
+    if _tracker is None:
+        _tracker = PostTracker()
+    return _tracker
@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+import praw
+import prawcore
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import asyncpraw
+    import asyncprawcore
+except ImportError:
+    asyncpraw = None
+    asyncprawcore = None
+
+# Presupuesto global de peticiones a Reddit (la API con OAuth admite 100/minuto)
+DEFAULT_REQUESTS_PER_MINUTE = 60
+
+# El token se renueva si le quedan menos de estos segundos. Es mayor que el
+# intervalo del recolector, así que en modo continuo nunca llega a caducar
+TOKEN_REFRESH_MARGIN = 15 * 60
+
+
+class RateLimiter:
+    """
+    Limitador de peticiones por cubo de fichas, compartido por todos los
+    hilos y corrutinas del proceso. Cada petición reserva una ficha; si no
+    quedan, la reserva devuelve cuánto hay que esperar, de modo que las
+    peticiones simultáneas se reparten el presupuesto en orden de llegada.
+    """
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst or max(1, requests_per_minute // 6)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Reserva una petición y devuelve los segundos que hay que esperar antes de hacerla"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            self.requests += 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def wait(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+def token_ttl(authorizer):
+    """Segundos de validez que le quedan al token de acceso, o None si no hay token"""
+    if getattr(authorizer, 'access_token', None) is None:
+        return None
+    # prawcore >= 3 guarda la caducidad en un reloj monotónico en nanosegundos
+    expiration_ns = getattr(authorizer, '_expiration_timestamp_ns', None)
+    if expiration_ns is not None:
+        return (expiration_ns - time.monotonic_ns()) / 1e9
+    expiration = getattr(authorizer, '_expiration_timestamp', None)
+    return expiration - time.time() if expiration is not None else None
+
+
+class CountingRequestor(prawcore.Requestor):
+    """Requestor de PRAW que cuenta cada petición HTTP en el gestor de clientes"""
+    def __init__(self, *args, manager=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._manager = manager
+
+    def request(self, *args, **kwargs):
+        self._manager.record_request()
+        return super().request(*args, **kwargs)
+
+
+if asyncprawcore is not None:
+    class AsyncCountingRequestor(asyncprawcore.Requestor):
+        """Requestor de asyncpraw que cuenta cada petición HTTP en el gestor de clientes"""
+        def __init__(self, *args, manager=None, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._manager = manager
+
+        async def request(self, *args, **kwargs):
+            self._manager.record_request()
+            return await super().request(*args, **kwargs)
+
+
+class RedditClientManager:
+    """
+    Clase para mantener un único cliente de Reddit autenticado por proceso.
+
+    El cliente, su token de acceso y su pool de conexiones HTTP se reutilizan
+    entre ciclos (run_continuous.py vive durante días). El token se renueva
+    antes de caducar, de modo que ninguna petición tiene que esperar a la
+    autenticación. Lleva estadísticas de peticiones, renovaciones de token y
+    clientes creados.
+    """
+    def __init__(self, credentials, rate_limiter=None, refresh_margin=TOKEN_REFRESH_MARGIN):
+        self.credentials = credentials
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.refresh_margin = refresh_margin
+        self.started = time.time()
+        self.stats = {"requests": 0, "token_refreshes": 0, "clients_created": 0}
+        self._lock = threading.Lock()
+        self._reddit = None
+        self._async_reddit = None
+
+    def record_request(self):
+        with self._lock:
+            self.stats["requests"] += 1
+
+    def _record(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _needs_refresh(self, authorizer):
+        ttl = token_ttl(authorizer)
+        return ttl is None or ttl < self.refresh_margin
+
+    def get_reddit(self):
+        """Cliente PRAW compartido, con el token renovado si está a punto de caducar"""
+        with self._lock:
+            if self._reddit is None:
+                # Sesión HTTP propia para conservar las conexiones abiertas entre ciclos
+                session = requests.Session()
+                session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+                self._reddit = praw.Reddit(**self.credentials, requestor_class=CountingRequestor,
+                                           requestor_kwargs={"session": session, "manager": self})
+                self.stats["clients_created"] += 1
+            reddit = self._reddit
+
+        authorizer = reddit._core._authorizer
+        if self._needs_refresh(authorizer):
+            authorizer.refresh()
+            self._record("token_refreshes")
+        return reddit
+
+    async def get_async_reddit(self):
+        """
+        Cliente asyncpraw compartido, con el token renovado si está a punto de
+        caducar. Debe usarse siempre desde el mismo bucle de eventos.
+        """
+        if self._async_reddit is None:
+            self._async_reddit = asyncpraw.Reddit(**self.credentials, requestor_class=AsyncCountingRequestor,
+                                                  requestor_kwargs={"manager": self})
+            self._record("clients_created")
+
+        authorizer = self._async_reddit._core._authorizer
+        if self._needs_refresh(authorizer):
+            await authorizer.refresh()
+            self._record("token_refreshes")
+        return self._async_reddit
+
+    async def close_async(self):
+        if self._async_reddit is not None:
+            await self._async_reddit.close()
+            self._async_reddit = None
+
+    def get_stats(self):
+        """Peticiones, renovaciones de token, clientes creados y validez restante del token"""
+        with self._lock:
+            stats = dict(self.stats)
+        client = self._reddit or self._async_reddit
+        ttl = token_ttl(client._core._authorizer) if client is not None else None
+        stats["token_ttl"] = round(ttl) if ttl is not None else None
+        stats["uptime"] = round(time.time() - self.started)
+        return stats
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_reddit_client_manager(credentials, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE):
+    """Obtiene el gestor de clientes de Reddit compartido por todo el proceso"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = RedditClientManager(credentials, RateLimiter(requests_per_minute))
+        return _manager
@@ -0,0 +1,161 @@
+import asyncio
+import threading
+from candidate_pool import PostRecord
+from reddit_client import DEFAULT_REQUESTS_PER_MINUTE, asyncpraw, get_reddit_client_manager
+
+
+def incomplete_records(records):
+    """Registros con algún campo ausente en el listado, por id"""
+    return {record.id: record for record in records if record.id and record.missing_fields()}
+
+
+def complete_records(records):
+    """Descarta los registros que siguen incompletos tras consultarlos en bloque"""
+    complete = [record for record in records if not record.missing_fields()]
+    if len(complete) < len(records):
+        print(f"Se descartan {len(records) - len(complete)} posts con datos incompletos")
+    return complete
+
+
+class AsyncRedditFetcher:
+    """
+    Descarga listados de Reddit en paralelo con asyncpraw.
+
+    El bucle de eventos vive en un hilo propio durante toda la vida del
+    proceso, así que las llamadas síncronas de bot.py y del recolector solo
+    encolan corrutinas. El cliente lo proporciona el RedditClientManager y
+    todas las peticiones pasan por su RateLimiter.
+    """
+    def __init__(self, client_manager):
+        self.client_manager = client_manager
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='reddit-fetcher', daemon=True)
+        self._thread.start()
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _fetch(self, subreddit_name, time_filter, limit):
+        reddit = await self.client_manager.get_async_reddit()
+        await self.client_manager.rate_limiter.acquire()
+        subreddit = await reddit.subreddit(subreddit_name)
+        records = [PostRecord.from_submission(post)
+                   async for post in subreddit.top(time_filter=time_filter, limit=limit)]
+
+        # Completar en una sola petición los posts a los que les falte algún campo
+        incomplete = incomplete_records(records)
+        if incomplete:
+            await self.client_manager.rate_limiter.acquire()
+            async for post in reddit.info(fullnames=[f"t3_{post_id}" for post_id in incomplete]):
+                incomplete[post.id].update(PostRecord.from_submission(post))
+        return complete_records(records)
+
+    async def _fetch_listings(self, listings, limit):
+        results = await asyncio.gather(*(self._fetch(s, t, limit) for s, t in listings), return_exceptions=True)
+        return dict(zip(listings, results))
+
+    async def _fetch_first(self, listings, limit, accept):
+        tasks = [asyncio.ensure_future(self._fetch(s, t, limit)) for s, t in listings]
+        try:
+            # Todas las descargas empiezan a la vez, pero se evalúan en orden
+            # de prioridad: el primer listado aceptado gana y el resto se cancela
+            for listing, task in zip(listings, tasks):
+                try:
+                    rows = await task
+                except Exception as e:
+                    print(f"Error al descargar r/{listing[0]} ({listing[1]}): {str(e)}")
+                    continue
+                if accept(listing, rows):
+                    return listing
+            return None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def fetch_listings(self, listings, limit):
+        """
+        Descarga varios listados (subreddit, filtro de tiempo) a la vez.
+
+        Returns:
+            dict: Filas de cada listado, o la excepción si falló
+        """
+        return self._run(self._fetch_listings(list(listings), limit))
+
+    def fetch_first(self, listings, limit, accept):
+        """
+        Descarga los listados a la vez y devuelve el primero, en orden de
+        prioridad, para el que accept(listado, filas) devuelve True (o None).
+        """
+        return self._run(self._fetch_first(list(listings), limit, accept))
+
+    def keep_alive(self):
+        """Crea el cliente si hace falta y renueva el token si está a punto de caducar"""
+        self._run(self.client_manager.get_async_reddit())
+
+    def close(self):
+        self._run(self.client_manager.close_async())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class SyncRedditFetcher:
+    """Misma interfaz que AsyncRedditFetcher, descargando los listados uno a uno con PRAW"""
+    def __init__(self, client_manager):
+        self.client_manager = client_manager
+
+    def _fetch(self, subreddit_name, time_filter, limit):
+        reddit = self.client_manager.get_reddit()
+        self.client_manager.rate_limiter.wait()
+        records = [PostRecord.from_submission(post) for post in
+                   reddit.subreddit(subreddit_name).top(time_filter=time_filter, limit=limit)]
+
+        # Completar en una sola petición los posts a los que les falte algún campo
+        incomplete = incomplete_records(records)
+        if incomplete:
+            self.client_manager.rate_limiter.wait()
+            for post in reddit.info(fullnames=[f"t3_{post_id}" for post_id in incomplete]):
+                incomplete[post.id].update(PostRecord.from_submission(post))
+        return complete_records(records)
+
+    def fetch_listings(self, listings, limit):
+        results = {}
+        for listing in listings:
+            try:
+                results[listing] = self._fetch(listing[0], listing[1], limit)
+            except Exception as e:
+                results[listing] = e
+        return results
+
+    def fetch_first(self, listings, limit, accept):
+        for listing in listings:
+            try:
+                rows = self._fetch(listing[0], listing[1], limit)
+            except Exception as e:
+                print(f"Error al descargar r/{listing[0]} ({listing[1]}): {str(e)}")
+                continue
+            if accept(listing, rows):
+                return listing
+        return None
+
+    def keep_alive(self):
+        """Crea el cliente si hace falta y renueva el token si está a punto de caducar"""
+        self.client_manager.get_reddit()
+
+    def close(self):
+        pass
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_reddit_fetcher(credentials, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE):
+    """
+    Obtiene el descargador de listados compartido por todo el proceso (y con
+    él, un único cliente de Reddit y un único presupuesto de peticiones).
+    """
+    global _fetcher
+    with _fetcher_lock:
+        if _fetcher is None:
+            fetcher_class = AsyncRedditFetcher if asyncpraw is not None else SyncRedditFetcher
+            _fetcher = fetcher_class(get_reddit_client_manager(credentials, requests_per_minute))
+        return _fetcher
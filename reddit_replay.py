@@ -0,0 +1,287 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from candidate_pool import PostRecord
+
+# Carpeta predeterminada de las grabaciones de listados
+DEFAULT_FIXTURES_DIR = 'reddit_fixtures'
+
+
+class ReplayError(Exception):
+    """Error simulado, o listado sin grabar, del Reddit local"""
+
+
+def fixture_path(fixtures_dir, subreddit, time_filter):
+    return os.path.join(fixtures_dir, f"{subreddit.lower()}_{time_filter}.json")
+
+
+class FixtureRecorder:
+    """
+    Envuelve un descargador de reddit_fetcher.py y guarda cada listado que
+    descarga en un archivo JSON de `fixtures_dir`, para reproducirlo después
+    sin conexión con ReplayRedditFetcher. Tiene la misma interfaz que los
+    descargadores.
+    """
+    def __init__(self, fetcher, fixtures_dir=DEFAULT_FIXTURES_DIR):
+        self.fetcher = fetcher
+        self.fixtures_dir = fixtures_dir
+        self.recorded = 0
+
+    def _record(self, listing, records):
+        os.makedirs(self.fixtures_dir, exist_ok=True)
+        subreddit, time_filter = listing
+        fixture = {
+            "subreddit": subreddit,
+            "time_filter": time_filter,
+            "recorded_at": time.time(),
+            "posts": [record.as_dict() for record in records]
+        }
+        path = fixture_path(self.fixtures_dir, subreddit, time_filter)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(fixture, f, indent=2)
+        os.replace(path + '.tmp', path)
+        self.recorded += 1
+
+    def fetch_listings(self, listings, limit):
+        results = self.fetcher.fetch_listings(listings, limit)
+        for listing, records in results.items():
+            if not isinstance(records, Exception):
+                self._record(listing, records)
+        return results
+
+    def fetch_first(self, listings, limit, accept):
+        def record_and_accept(listing, records):
+            self._record(listing, records)
+            return accept(listing, records)
+        return self.fetcher.fetch_first(listings, limit, record_and_accept)
+
+    def keep_alive(self):
+        self.fetcher.keep_alive()
+
+    def close(self):
+        self.fetcher.close()
+
+
+class ReplayRedditFetcher:
+    """
+    Reddit local que reproduce los listados grabados por FixtureRecorder,
+    con la misma interfaz que los descargadores de reddit_fetcher.py, para
+    ejecutar get_viral_post sin credenciales ni conexión.
+
+    Cada descarga espera `latency` segundos (± `jitter`) y falla con
+    probabilidad `error_rate`. Las descargas de una misma llamada se hacen
+    en paralelo, como con asyncpraw. Con `seed` la secuencia de esperas y
+    errores es siempre la misma. Las fechas de los posts se desplazan para
+    que conserven la antigüedad que tenían al grabarse, de modo que la
+    viralidad no cambia con el paso del tiempo.
+    """
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, latency=0.0, jitter=0.0, error_rate=0.0, seed=None,
+                 workers=8):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stats = {"requests": 0, "errors": 0, "missing": 0, "latency": 0.0}
+        self._random = random.Random(seed)
+        self._fixtures = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reddit-replay')
+
+    def _load(self, subreddit, time_filter):
+        key = (subreddit.lower(), time_filter)
+        with self._lock:
+            if key not in self._fixtures:
+                path = fixture_path(self.fixtures_dir, subreddit, time_filter)
+                if os.path.exists(path):
+                    with open(path, 'r') as f:
+                        self._fixtures[key] = json.load(f)
+                else:
+                    self._fixtures[key] = None
+            return self._fixtures[key]
+
+    def _plan(self):
+        """Espera y resultado de una descarga, sorteados en el hilo que llama para que sean reproducibles"""
+        delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+        fail = self._random.random() < self.error_rate
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats["latency"] += delay
+        return delay, fail
+
+    def _fetch(self, listing, limit, delay, fail):
+        subreddit, time_filter = listing
+        if delay:
+            time.sleep(delay)
+        if fail:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise ReplayError(f"Error simulado al descargar r/{subreddit} ({time_filter})")
+
+        fixture = self._load(subreddit, time_filter)
+        if fixture is None:
+            with self._lock:
+                self.stats["missing"] += 1
+            raise ReplayError(f"No hay grabación de r/{subreddit} ({time_filter}) en {self.fixtures_dir}")
+
+        shift = time.time() - fixture["recorded_at"]
+        records = []
+        for post in fixture["posts"][:limit]:
+            record = PostRecord(**{field: post[field] for field in PostRecord.COLUMNS if field in post})
+            if record.created_utc is not None:
+                record.created_utc += shift
+            records.append(record)
+        return records
+
+    def _submit(self, listings, limit):
+        return [self._executor.submit(self._fetch, listing, limit, *self._plan()) for listing in listings]
+
+    def fetch_listings(self, listings, limit):
+        listings = list(listings)
+        results = {}
+        for listing, future in zip(listings, self._submit(listings, limit)):
+            try:
+                results[listing] = future.result()
+            except Exception as e:
+                results[listing] = e
+        return results
+
+    def fetch_first(self, listings, limit, accept):
+        listings = list(listings)
+        futures = self._submit(listings, limit)
+        try:
+            for listing, future in zip(listings, futures):
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    print(f"Error al descargar r/{listing[0]} ({listing[1]}): {str(e)}")
+                    continue
+                if accept(listing, rows):
+                    return listing
+            return None
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def keep_alive(self):
+        pass
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["latency"] = round(stats["latency"], 3)
+        return stats
+
+
+def record_fixtures(fixtures_dir=DEFAULT_FIXTURES_DIR, limit=None):
+    """
+    Graba el top de todos los subreddits activos y filtros de tiempo de
+    content_config.json (y el de AskReddit del día, el último recurso de
+    get_viral_post). Necesita las credenciales de Reddit del archivo .env.
+    """
+    from bot import reddit_credentials
+    from candidate_pool import HARVEST_LIMIT
+    from content_diversifier import ContentDiversifier
+    from reddit_fetcher import get_reddit_fetcher
+
+    config = ContentDiversifier().config
+    listings = [(s, t) for s in config["active_subreddits"] for t in config["time_filters"]]
+    if ('askreddit', 'day') not in {(s.lower(), t) for s, t in listings}:
+        listings.append(('AskReddit', 'day'))
+
+    recorder = FixtureRecorder(get_reddit_fetcher(reddit_credentials()), fixtures_dir)
+    for (subreddit, time_filter), result in recorder.fetch_listings(listings, limit or HARVEST_LIMIT).items():
+        if isinstance(result, Exception):
+            print(f"Error al grabar r/{subreddit} ({time_filter}): {str(result)}")
+    print(f"Grabados {recorder.recorded} de {len(listings)} listados en {fixtures_dir}")
+    return recorder.recorded
+
+
+def benchmark(fetcher, cycles=100, seed=None, cold=False):
+    """
+    Ejecuta get_viral_post `cycles` veces contra un descargador (normalmente
+    ReplayRedditFetcher), con un pool de candidatos en memoria y un
+    historial de posts temporal, sin tocar los archivos del bot.
+
+    Args:
+        seed: Semilla de la selección aleatoria, para obtener siempre la misma secuencia de posts
+        cold: Si es True cada ciclo empieza con el pool vacío, de modo que todos descargan listados
+
+    Returns:
+        dict: Ciclos, posts elegidos, segundos, ciclos por hora y secuencia de ids elegidos
+    """
+    from bot import get_viral_post
+    from candidate_pool import CandidatePool
+    from content_diversifier import ContentDiversifier
+    from post_tracker import PostTracker
+
+    if seed is not None:
+        random.seed(seed)
+    content_diversifier = ContentDiversifier()
+    selection = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        post_tracker = PostTracker(os.path.join(tmp_dir, 'posts_history.json'))
+        candidate_pool = CandidatePool(':memory:')
+        start = time.perf_counter()
+        for _ in range(cycles):
+            if cold:
+                candidate_pool = CandidatePool(':memory:')
+            _, post_id, _ = get_viral_post(post_tracker, content_diversifier, candidate_pool, fetcher)
+            selection.append(post_id)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "cycles": cycles,
+        "selected": sum(post_id is not None for post_id in selection),
+        "seconds": round(elapsed, 3),
+        "cycles_per_hour": round(cycles * 3600 / elapsed) if elapsed else None,
+        "selection": selection
+    }
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Graba listados de Reddit y los reproduce sin conexión para medir la selección de posts')
+    parser.add_argument('command', choices=['record', 'benchmark'])
+    parser.add_argument('--dir', default=DEFAULT_FIXTURES_DIR, help=f'Carpeta de las grabaciones (default: {DEFAULT_FIXTURES_DIR})')
+    parser.add_argument('--limit', type=int, default=None, help='Posts que se graban de cada listado')
+    parser.add_argument('--cycles', type=int, default=100, help='Ciclos de selección que se ejecutan (default: 100)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Segundos de espera simulada por listado')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Variación aleatoria de la espera, en segundos')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Probabilidad de que una descarga falle (0-1)')
+    parser.add_argument('--seed', type=int, default=None, help='Semilla para que la ejecución sea reproducible')
+    parser.add_argument('--cold', action='store_true', help='Vacía el pool de candidatos en cada ciclo')
+    parser.add_argument('--baseline', default=None,
+                        help='Archivo JSON con la secuencia de posts esperada: se crea si no existe y, si existe, se compara')
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        record_fixtures(args.dir, args.limit)
+    else:
+        fetcher = ReplayRedditFetcher(args.dir, args.latency, args.jitter, args.error_rate, args.seed)
+        result = benchmark(fetcher, args.cycles, args.seed, args.cold)
+        fetcher.close()
+        print(f"{result['cycles']} ciclos en {result['seconds']} s: {result['cycles_per_hour']} ciclos/hora, "
+              f"{result['selected']} posts elegidos")
+        print(f"Reddit local: {fetcher.get_stats()}")
+
+        if args.baseline:
+            if os.path.exists(args.baseline):
+                with open(args.baseline, 'r') as f:
+                    expected = json.load(f)
+                differences = [i for i, (a, b) in enumerate(zip(expected, result["selection"])) if a != b]
+                if differences or len(expected) != len(result["selection"]):
+                    first = differences[0] if differences else min(len(expected), len(result["selection"]))
+                    print(f"La selección difiere de {args.baseline} a partir del ciclo {first + 1}")
+                    raise SystemExit(1)
+                print(f"La selección coincide con {args.baseline}")
+            else:
+                with open(args.baseline, 'w') as f:
+                    json.dump(result["selection"], f, indent=2)
+                print(f"Secuencia de posts guardada en {args.baseline}")
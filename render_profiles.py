@@ -0,0 +1,191 @@
+import json
+import os
+from datetime import datetime
+
+# Perfiles de codificación con nombre. Los valores None se omiten al llamar
+# a ffmpeg para que use su comportamiento por defecto.
+RENDER_PROFILES = {
+    # Borradores rápidos: prioriza el tiempo de codificación sobre el tamaño
+    "fast-draft": {
+        "codec": "libx264",
+        "preset": "ultrafast",
+        "crf": 28,
+        "bitrate": None,
+        "threads": None,
+        "audio_codec": "aac",
+        "audio_bitrate": "96k",
+        "audio_rate": 44100,
+        "audio_channels": 2,
+        "fps": 24
+    },
+    # Equilibrio entre calidad y velocidad para subir a YouTube Shorts
+    "shorts-balanced": {
+        "codec": "libx264",
+        "preset": "veryfast",
+        "crf": 23,
+        "bitrate": None,
+        "threads": None,
+        "audio_codec": "aac",
+        "audio_bitrate": "128k",
+        "audio_rate": 44100,
+        "audio_channels": 2,
+        "fps": 24
+    },
+    # Máxima calidad para conservar una copia del video
+    "archive": {
+        "codec": "libx264",
+        "preset": "slow",
+        "crf": 18,
+        "bitrate": None,
+        "threads": None,
+        "audio_codec": "aac",
+        "audio_bitrate": "192k",
+        "audio_rate": 44100,
+        "audio_channels": 2,
+        "fps": 24
+    }
+}
+
+DEFAULT_RENDER_PROFILE = "shorts-balanced"
+
+
+def default_thread_count():
+    """
+    Número de hilos por defecto para el codificador. En máquinas compartidas
+    usar todos los núcleos no acelera x264 y perjudica a los demás procesos,
+    así que se usa la mitad de los núcleos disponibles (máximo 8).
+    """
+    return max(1, min(8, (os.cpu_count() or 2) // 2))
+
+
+def get_render_profile(name=DEFAULT_RENDER_PROFILE):
+    """Obtiene una copia del perfil de renderizado con los hilos resueltos"""
+    if name not in RENDER_PROFILES:
+        raise ValueError(f"Perfil de renderizado desconocido: {name}. "
+                         f"Disponibles: {', '.join(RENDER_PROFILES)}")
+    profile = dict(RENDER_PROFILES[name])
+    profile["name"] = name
+    if not profile["threads"]:
+        profile["threads"] = default_thread_count()
+    return profile
+
+
+def moviepy_write_args(profile):
+    """Convierte un perfil en argumentos para VideoClip.write_videofile"""
+    ffmpeg_params = []
+    if profile["bitrate"] is None and profile["crf"] is not None:
+        ffmpeg_params += ['-crf', str(profile["crf"])]
+
+    return {
+        "fps": profile["fps"],
+        "codec": profile["codec"],
+        "preset": profile["preset"],
+        "bitrate": profile["bitrate"],
+        "threads": profile["threads"],
+        "audio_codec": profile["audio_codec"],
+        "audio_bitrate": profile["audio_bitrate"],
+        "audio_fps": profile["audio_rate"],
+        "ffmpeg_params": ffmpeg_params or None
+    }
+
+
+def ffmpeg_video_args(profile):
+    """Convierte un perfil en argumentos de salida de video para ffmpeg"""
+    args = ['-c:v', profile["codec"], '-preset', profile["preset"]]
+    if profile["bitrate"] is not None:
+        args += ['-b:v', profile["bitrate"]]
+    elif profile["crf"] is not None:
+        args += ['-crf', str(profile["crf"])]
+    args += ['-threads', str(profile["threads"]), '-pix_fmt', 'yuv420p']
+    return args
+
+
+def ffmpeg_audio_args(profile):
+    """
+    Convierte un perfil en argumentos de salida de audio para ffmpeg. La
+    frecuencia y los canales se fijan para que todos los segmentos codificados
+    con el mismo perfil se puedan concatenar sin recodificar.
+    """
+    args = ['-c:a', profile["audio_codec"]]
+    if profile["audio_bitrate"] is not None:
+        args += ['-b:a', profile["audio_bitrate"]]
+    args += ['-ar', str(profile["audio_rate"]), '-ac', str(profile["audio_channels"])]
+    return args
+
+
+def ffmpeg_silence_input(profile):
+    """Entrada de ffmpeg con silencio en el formato de audio del perfil"""
+    layout = 'stereo' if profile["audio_channels"] == 2 else 'mono'
+    return ['-f', 'lavfi', '-i', f'anullsrc=r={profile["audio_rate"]}:cl={layout}']
+
+
+class RenderStats:
+    """
+    Clase para registrar el tiempo de codificación y el tamaño de los videos
+    generados con cada perfil de renderizado.
+    """
+    # Número máximo de codificaciones individuales que se conservan
+    MAX_ENCODES = 500
+
+    def __init__(self, stats_file='render_stats.json'):
+        self.stats_file = stats_file
+        self.stats = self._load_stats()
+
+    def _load_stats(self):
+        """Carga las estadísticas de renderizado desde el archivo"""
+        if os.path.exists(self.stats_file):
+            try:
+                with open(self.stats_file, 'r') as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                print(f"Error al leer el archivo {self.stats_file}, creando nuevas estadísticas")
+                return {"encodes": [], "profiles": {}}
+        else:
+            return {"encodes": [], "profiles": {}}
+
+    def _save_stats(self):
+        """Guarda las estadísticas de renderizado en el archivo"""
+        with open(self.stats_file, 'w') as f:
+            json.dump(self.stats, f, indent=2)
+
+    def register_encode(self, profile_name, output_path, encode_time, duration, render_mode=None):
+        """Registra una codificación: tiempo empleado y tamaño del archivo resultante"""
+        file_size = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+
+        encode_data = {
+            "profile": profile_name,
+            "render_mode": render_mode,
+            "file": os.path.basename(output_path),
+            "date": datetime.now().isoformat(),
+            "encode_time": round(encode_time, 3),
+            "duration": round(duration, 3),
+            "file_size": file_size
+        }
+        self.stats["encodes"].append(encode_data)
+        self.stats["encodes"] = self.stats["encodes"][-self.MAX_ENCODES:]
+
+        # Actualizar los totales del perfil
+        totals = self.stats["profiles"].setdefault(
+            profile_name, {"count": 0, "encode_time": 0.0, "duration": 0.0, "file_size": 0})
+        totals["count"] += 1
+        totals["encode_time"] = round(totals["encode_time"] + encode_time, 3)
+        totals["duration"] = round(totals["duration"] + duration, 3)
+        totals["file_size"] += file_size
+
+        self._save_stats()
+        return encode_data
+
+    def get_profile_summary(self):
+        """Obtiene el tiempo medio, el tamaño medio y la velocidad de cada perfil"""
+        summary = {}
+        for name, totals in self.stats["profiles"].items():
+            if not totals["count"]:
+                continue
+            summary[name] = {
+                "count": totals["count"],
+                "avg_encode_time": totals["encode_time"] / totals["count"],
+                "avg_file_size": totals["file_size"] / totals["count"],
+                # Segundos de video producidos por cada segundo de codificación
+                "speed": totals["duration"] / totals["encode_time"] if totals["encode_time"] else 0
+            }
+        return summary
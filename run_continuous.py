@@ -2,9 +2,20 @@ import os
 import sys
 import argparse
 from dotenv import load_dotenv
-from bot import main_bot_process
+from bot import main_bot_process, prepare_music, reddit_credentials
+from candidate_pool import get_candidate_pool
+from content_filter import get_content_filter
+from post_tracker import get_post_tracker
+from reddit_fetcher import get_reddit_fetcher
+from reddit_client import get_reddit_client_manager
+from reddit_replay import ReplayRedditFetcher
+from content_diversifier import ContentDiversifier
 from quota_manager import QuotaManager
 from bot_scheduler import BotScheduler
+from tts_service import get_tts_service
+from tts_cache import get_tts_cache
+from render_profiles import DEFAULT_RENDER_PROFILE, RENDER_PROFILES, RenderStats
+from audio_processing import DEFAULT_MAX_DURATION
 
 def run_continuous_bot():
     """
@@ -24,11 +35,25 @@ def run_continuous_bot():
                        help='Tiempo de espera inicial en minutos antes de la primera ejecución (default: 0)')
     parser.add_argument('--no-upload', action='store_true',
                        help='Solo genera videos, sin subirlos a YouTube')
+    parser.add_argument('--render-profile', choices=list(RENDER_PROFILES), default=DEFAULT_RENDER_PROFILE,
+                       help=f'Perfil de codificación del video (default: {DEFAULT_RENDER_PROFILE})')
+    parser.add_argument('--animated-bg', action='store_true',
+                       help='Usa un fondo degradado animado en lugar de un color plano')
+    parser.add_argument('--captions', action='store_true',
+                       help='Resalta cada palabra del texto mientras se pronuncia')
+    parser.add_argument('--branding', action='store_true',
+                       help='Añade la entrada y salida de marca configuradas')
+    parser.add_argument('--max-duration', type=float, default=DEFAULT_MAX_DURATION,
+                       help=f'Duración máxima del video en segundos, 0 sin límite (default: {DEFAULT_MAX_DURATION})')
+    parser.add_argument('--music', action='store_true',
+                       help='Mezcla música de fondo (carpeta music/) bajo la locución')
+    parser.add_argument('--replay', metavar='DIR', default=None,
+                       help='Usa los listados grabados en DIR (ver reddit_replay.py) en lugar de Reddit')
     args = parser.parse_args()
     
     # Verificar si existen credenciales
     load_dotenv()
-    if not os.getenv('CLIENT_ID') or not os.getenv('CLIENT_SECRET'):
+    if not args.replay and (not os.getenv('CLIENT_ID') or not os.getenv('CLIENT_SECRET')):
         print("ERROR: Faltan credenciales de Reddit en el archivo .env")
         print("Por favor, configura CLIENT_ID y CLIENT_SECRET en el archivo .env")
         sys.exit(1)
@@ -42,11 +67,47 @@ def run_continuous_bot():
     # Crear un administrador de cuotas
     quota_manager = QuotaManager()
     
+    # Cargar el historial de posts una sola vez: todos los ciclos lo comparten
+    post_tracker = get_post_tracker()
+    print(f"Historial de posts cargado: {post_tracker.get_total_posts_used()} posts usados")
+    
+    if args.music:
+        prepare_music(args.render_profile)
+    
+    # Mantener el pool de posts candidatos actualizado en segundo plano, de
+    # modo que cada ciclo elige un post sin esperar a Reddit
+    reddit_fetcher = ReplayRedditFetcher(args.replay) if args.replay else get_reddit_fetcher(reddit_credentials())
+    candidate_pool = get_candidate_pool()
+    candidate_pool.start_harvester(reddit_fetcher, lambda: ContentDiversifier().config)
+    
     # Función de callback que ejecutará el bot
     def run_bot_cycle():
         try:
             print("\n\nIniciando nuevo ciclo de bot...")
-            result = main_bot_process(args.no_upload)
+            result = main_bot_process(args.no_upload, args.render_profile, args.animated_bg, args.captions,
+                                      args.branding, args.max_duration, args.music, reddit_fetcher)
+            if args.replay:
+                print(f"Reddit local: {reddit_fetcher.get_stats()}")
+            else:
+                stats = get_reddit_client_manager(reddit_credentials()).get_stats()
+                print(f"Cliente de Reddit: {stats['requests']} peticiones, {stats['token_refreshes']} renovaciones "
+                      f"de token y {stats['clients_created']} cliente(s) creados en {stats['uptime'] // 3600} h")
+            tts_stats = get_tts_service().get_stats()
+            print(f"Servicio de TTS: {tts_stats['requests_served']} síntesis atendidas, "
+                  f"{tts_stats['engine_restarts']} reinicio(s) del motor")
+            cache_stats = get_tts_cache().get_stats()
+            print(f"Caché de TTS: {cache_stats['hits']} aciertos, {cache_stats['misses']} fallos, "
+                  f"{cache_stats['entries']} audios ({cache_stats['size'] / 1e6:.1f} de "
+                  f"{cache_stats['max_bytes'] / 1e6:.0f} MB)")
+            render_summary = RenderStats().get_profile_summary().get(args.render_profile)
+            if render_summary:
+                print(f"Renderizado ({args.render_profile}): {render_summary['count']} videos, "
+                      f"{render_summary['avg_encode_time']:.1f} s de media por video, "
+                      f"{render_summary['avg_file_size'] / 1e6:.1f} MB de media, "
+                      f"x{render_summary['speed']:.1f} tiempo real")
+            filter_stats = get_content_filter().get_stats()
+            print(f"Filtro de contenido (desde el inicio): {filter_stats['accepted']} de {filter_stats['checked']} "
+                  f"posts aceptados, descartados por regla: {filter_stats['rejected']}")
             return result
         except Exception as e:
             print(f"Error en ciclo del bot: {str(e)}")
@@ -61,6 +122,13 @@ def run_continuous_bot():
     print(f"\nConfiguración del bot:")
     print(f"- Modo subida: {'DESACTIVADO (--no-upload)' if args.no_upload else 'ACTIVADO'}")
     print(f"- Máximo diario: {args.max_daily} videos")
+    print(f"- Perfil de renderizado: {args.render_profile}")
+    print(f"- Fondo animado: {'ACTIVADO' if args.animated_bg else 'DESACTIVADO'}")
+    print(f"- Subtítulos sincronizados: {'ACTIVADO' if args.captions else 'DESACTIVADO'}")
+    print(f"- Entrada y salida de marca: {'ACTIVADO' if args.branding else 'DESACTIVADO'}")
+    print(f"- Música de fondo: {'ACTIVADO' if args.music else 'DESACTIVADO'}")
+    print(f"- Duración máxima: {f'{args.max_duration:g}s' if args.max_duration else 'SIN LÍMITE'}")
+    print(f"- Reddit: {f'GRABACIONES DE {args.replay} (--replay)' if args.replay else 'EN VIVO'}")
     print(f"- Retraso inicial: {args.initial_delay} minutos")
     
     # Verificar cuota disponible
@@ -84,6 +152,8 @@ def run_continuous_bot():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        candidate_pool.stop_harvester()
 
 if __name__ == "__main__":
     run_continuous_bot()
@@ -0,0 +1,35 @@
+import time
+from candidate_pool import CandidatePool, PostRecord
+
+
+def make_records(subreddit, ids):
+    now = time.time()
+    return [PostRecord(post_id, subreddit, f"A perfectly normal title for post {post_id}", f"/r/{subreddit}/{post_id}",
+                       score=100, upvote_ratio=0.95, num_comments=10, created_utc=now - 3600, over_18=False)
+            for post_id in ids]
+
+
+def test_listing_spellings_share_one_listing():
+    pool = CandidatePool(':memory:')
+    pool.store_listing('askreddit', 'day', make_records('AskReddit', ['old1', 'old2']))
+    pool.store_listing('AskReddit', 'day', make_records('AskReddit', ['new1']))
+
+    assert pool.has_listing('ASKREDDIT', 'day')
+    assert pool.stale_listings(['AskReddit', 'askreddit'], ['day']) == []
+    assert [post.id for post in pool.get_candidates('askreddit', 'day', limit=10)] == ['new1']
+    assert pool.get_stats() == {"listings": 1, "posts": 1}
+
+
+def test_mixed_case_listings_from_older_pools_are_dropped(tmp_path):
+    db_file = str(tmp_path / 'candidate_pool.db')
+    pool = CandidatePool(db_file)
+    pool.store_listing('askreddit', 'day', make_records('AskReddit', ['kept']))
+    with pool._conn:
+        pool._conn.execute("INSERT INTO listings VALUES ('AskReddit', 'week', ?)", (time.time(),))
+        pool._conn.execute("INSERT INTO listing_posts VALUES ('AskReddit', 'week', 0, 'kept')")
+    pool._conn.close()
+
+    pool = CandidatePool(db_file)
+    rows = pool._conn.execute("SELECT subreddit, time_filter FROM listings").fetchall()
+    assert [tuple(row) for row in rows] == [('askreddit', 'day')]
+    assert pool.is_stale('AskReddit', 'week')
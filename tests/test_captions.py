@@ -0,0 +1,47 @@
+import numpy as np
+from captions import CaptionLayer
+from text_layout import fit_text
+from video_renderer import AlphaLayer
+
+FRAME_WIDTH, FRAME_HEIGHT = 1080, 1920
+
+# Texto tan largo que no cabe en el fotograma ni con el tamaño de fuente mínimo
+LONG_TEXT = " ".join(f"This is sentence number {i} of a story that is far too long to fit." for i in range(40))
+
+
+def test_caption_words_outside_frame_are_clipped():
+    layout = fit_text(LONG_TEXT)
+    positions = list(layout.word_positions(FRAME_WIDTH / 2, FRAME_HEIGHT / 2))
+    assert max(y for _, _, y in positions) > FRAME_HEIGHT
+
+    layer = CaptionLayer(layout, [(i, i + 1) for i in range(len(positions))])
+    buffer = np.zeros((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+    for index in range(len(layer.word_layers)):
+        layer.blit(buffer, index + 0.5)
+
+    assert any(word_layer.box is None for word_layer in layer.word_layers)
+    for word_layer in layer.word_layers:
+        if word_layer.box is not None:
+            top, bottom, left, right = word_layer.box
+            assert 0 <= top < bottom <= FRAME_HEIGHT and 0 <= left < right <= FRAME_WIDTH
+
+
+def test_alpha_layer_partially_outside_frame():
+    rgba = np.full((40, 60, 4), 255, dtype=np.uint8)
+    layer = AlphaLayer(rgba, position=(-20, FRAME_HEIGHT - 20), frame_size=(FRAME_WIDTH, FRAME_HEIGHT))
+    assert layer.box == (FRAME_HEIGHT - 20, FRAME_HEIGHT, 0, 40)
+
+    buffer = np.zeros((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+    layer.blit(buffer, 0)
+    assert (buffer[FRAME_HEIGHT - 20:, :40] == 255).all()
+    assert not buffer[:FRAME_HEIGHT - 20].any() and not buffer[:, 40:].any()
+
+
+def test_alpha_layer_entirely_outside_frame():
+    rgba = np.full((40, 60, 4), 255, dtype=np.uint8)
+    layer = AlphaLayer(rgba, position=(0, FRAME_HEIGHT + 10), frame_size=(FRAME_WIDTH, FRAME_HEIGHT))
+    assert layer.box is None
+
+    buffer = np.zeros((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+    layer.blit(buffer, 0)
+    assert not buffer.any()
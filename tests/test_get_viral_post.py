@@ -0,0 +1,64 @@
+import json
+import os
+import time
+from bot import get_viral_post
+from candidate_pool import CandidatePool
+from content_diversifier import ContentDiversifier
+from post_tracker import PostTracker
+from reddit_replay import ReplayRedditFetcher, fixture_path
+
+
+def write_fixture(fixtures_dir, subreddit, time_filter, posts):
+    os.makedirs(fixtures_dir, exist_ok=True)
+    now = time.time()
+    fixture = {
+        "subreddit": subreddit,
+        "time_filter": time_filter,
+        "recorded_at": now,
+        "posts": [dict({"subreddit": subreddit, "permalink": f"/r/{subreddit}/comments/{post['id']}/",
+                        "upvote_ratio": 0.95, "num_comments": 100, "created_utc": now - 3600,
+                        "over_18": False, "has_url": False}, **post) for post in posts]
+    }
+    with open(fixture_path(fixtures_dir, subreddit, time_filter), 'w') as f:
+        json.dump(fixture, f)
+
+
+def make_diversifier(tmp_path, picks):
+    """Diversificador con AskReddit y Showerthoughts que elige los subreddits de `picks` en orden"""
+    config_file = tmp_path / 'content_config.json'
+    config_file.write_text(json.dumps({
+        "active_subreddits": ["AskReddit", "Showerthoughts"],
+        "subreddit_weights": {"AskReddit": 10, "Showerthoughts": 10},
+        "time_filters": ["day"],
+        "time_filter_weights": {"day": 100},
+        "post_count": 5
+    }))
+    diversifier = ContentDiversifier(str(config_file))
+    picks = iter(picks)
+    diversifier.select_random_subreddit = lambda: next(picks)
+    return diversifier
+
+
+def test_primary_askreddit_day_is_filtered_with_primary_options(tmp_path):
+    # El principal coincide con el último recurso (AskReddit, day), que admite
+    # enlaces; el principal no, así que debe elegirse el post del alternativo
+    fixtures_dir = str(tmp_path / 'fixtures')
+    write_fixture(fixtures_dir, 'AskReddit', 'day', [
+        {"id": "link1", "title": "A very popular link post on AskReddit", "score": 90000, "has_url": True}
+    ])
+    write_fixture(fixtures_dir, 'Showerthoughts', 'day', [
+        {"id": "text1", "title": "A modest but perfectly valid shower thought", "score": 50}
+    ])
+
+    for warm in (False, True):
+        fetcher = ReplayRedditFetcher(fixtures_dir)
+        candidate_pool = CandidatePool(':memory:')
+        if warm:
+            candidate_pool.harvest(fetcher, ['AskReddit', 'Showerthoughts'], ['day'])
+        post_tracker = PostTracker(str(tmp_path / f'posts_history_{warm}.json'))
+        diversifier = make_diversifier(tmp_path, ['AskReddit', 'Showerthoughts'])
+
+        _, post_id, subreddit = get_viral_post(post_tracker, diversifier, candidate_pool, fetcher)
+        fetcher.close()
+
+        assert (post_id, subreddit) == ("text1", "Showerthoughts"), f"warm={warm}"
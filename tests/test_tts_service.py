@@ -0,0 +1,47 @@
+import time
+import numpy as np
+from audio_processing import SPEECH_SAMPLE_RATE, decode_pcm, write_pcm
+from tts_service import CHUNK_PAUSE, MIN_CHUNKED_CHARS, ChunkedSynthesizer, split_sentences
+
+CHUNK_SAMPLES = SPEECH_SAMPLE_RATE // 10
+
+
+def _init_tone_worker(voice_id, rate):
+    pass
+
+
+def _synthesize_tone(text, filename):
+    # Cada fragmento es un bloque constante con el número de su frase; los
+    # primeros tardan más, de modo que terminan en orden inverso
+    number = int(text.split()[1])
+    time.sleep(0.1 * (4 - number))
+    write_pcm(np.full(CHUNK_SAMPLES, number * 1000, dtype=np.int16), filename)
+    return filename
+
+
+class ToneSynthesizer(ChunkedSynthesizer):
+    """Pool de síntesis por fragmentos que escribe tonos en lugar de voz"""
+    worker_initializer = staticmethod(_init_tone_worker)
+    worker_synthesize = staticmethod(_synthesize_tone)
+
+
+def test_chunked_synthesis_joins_chunks_in_order(tmp_path):
+    text = " ".join(f"Sentence {i} " + "and so on " * 16 + "end." for i in range(1, 5))
+    chunks = split_sentences(text)
+    assert len(text) >= MIN_CHUNKED_CHARS
+    assert [chunk.split()[1] for chunk in chunks] == ["1", "2", "3", "4"]
+
+    synthesizer = ToneSynthesizer(workers=4)
+    try:
+        synthesizer.synthesize(text, str(tmp_path / 'speech.wav'))
+    finally:
+        synthesizer.shutdown()
+
+    samples = decode_pcm(str(tmp_path / 'speech.wav'))
+    pause = int(round(CHUNK_PAUSE * SPEECH_SAMPLE_RATE))
+    assert len(samples) == 4 * CHUNK_SAMPLES + 3 * pause
+    for i in range(4):
+        start = i * (CHUNK_SAMPLES + pause)
+        assert np.all(samples[start:start + CHUNK_SAMPLES] == (i + 1) * 1000)
+        if i < 3:
+            assert not samples[start + CHUNK_SAMPLES:start + CHUNK_SAMPLES + pause].any()
@@ -0,0 +1,201 @@
+from functools import lru_cache
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Fuentes a probar en orden de preferencia
+FONT_CANDIDATES = ("arial.ttf", "Arial.ttf", "DejaVuSans-Bold.ttf")
+
+# Zona segura para el texto dentro del video vertical de 1080x1920
+SAFE_WIDTH = 960
+SAFE_HEIGHT = 1400
+
+# Rango de tamaños de fuente para el ajuste automático
+MIN_FONT_SIZE = 32
+MAX_FONT_SIZE = 96
+
+# Separación entre líneas como múltiplo de la altura de la fuente
+LINE_SPACING = 1.15
+
+
+@lru_cache(maxsize=None)
+def resolve_font_path(fonts=FONT_CANDIDATES):
+    """
+    Busca una sola vez por proceso la primera fuente TrueType disponible de
+    la lista. Devuelve None si ninguna está instalada.
+    """
+    for candidate in fonts:
+        try:
+            ImageFont.truetype(candidate, 12)
+            return candidate
+        except OSError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=128)
+def get_font(size, fonts=FONT_CANDIDATES):
+    """Obtiene la fuente para un tamaño dado, cargándola solo la primera vez"""
+    font_path = resolve_font_path(fonts)
+    if font_path is not None:
+        return ImageFont.truetype(font_path, size)
+    try:
+        # Pillow >= 10.1 permite escalar la fuente por defecto
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=128)
+def get_line_height(size, fonts=FONT_CANDIDATES):
+    """Altura de una línea de texto (ascendente + descendente) para un tamaño"""
+    font = get_font(size, fonts)
+    try:
+        ascent, descent = font.getmetrics()
+        return ascent + descent
+    except AttributeError:
+        left, top, right, bottom = font.getbbox("Ag")
+        return bottom - top
+
+
+@lru_cache(maxsize=200000)
+def get_glyph_width(size, char, fonts=FONT_CANDIDATES):
+    """Avance horizontal de un carácter en píxeles para un tamaño de fuente"""
+    return get_font(size, fonts).getlength(char)
+
+
+@lru_cache(maxsize=50000)
+def measure_word(size, word, fonts=FONT_CANDIDATES):
+    """Ancho de una palabra en píxeles a partir de las métricas de cada glifo"""
+    return sum(get_glyph_width(size, char, fonts) for char in word)
+
+
+def measure_line(size, line, fonts=FONT_CANDIDATES):
+    """Ancho de una línea en píxeles"""
+    words = line.split(' ')
+    space = get_glyph_width(size, ' ', fonts)
+    return sum(measure_word(size, word, fonts) for word in words) + space * (len(words) - 1)
+
+
+def _split_long_word(word, size, max_width, fonts=FONT_CANDIDATES):
+    """Divide una palabra que no cabe en una línea en trozos que sí caben"""
+    pieces = []
+    current = ''
+    for char in word:
+        if current and measure_word(size, current + char, fonts) > max_width:
+            pieces.append(current)
+            current = char
+        else:
+            current += char
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def wrap_text(text, size, max_width=SAFE_WIDTH, fonts=FONT_CANDIDATES):
+    """
+    Ajusta el texto a líneas que no superen `max_width` píxeles usando el
+    ancho real de los glifos en lugar de un número fijo de caracteres.
+    """
+    space = get_glyph_width(size, ' ', fonts)
+    lines = []
+
+    for paragraph in text.splitlines() or ['']:
+        current_words = []
+        current_width = 0
+        for word in paragraph.split():
+            word_width = measure_word(size, word, fonts)
+            if word_width > max_width:
+                # La palabra no cabe sola: cerrar la línea actual y trocearla
+                if current_words:
+                    lines.append(' '.join(current_words))
+                pieces = _split_long_word(word, size, max_width, fonts)
+                lines.extend(pieces[:-1])
+                current_words = [pieces[-1]]
+                current_width = measure_word(size, pieces[-1], fonts)
+                continue
+
+            new_width = current_width + (space if current_words else 0) + word_width
+            if current_words and new_width > max_width:
+                lines.append(' '.join(current_words))
+                current_words = [word]
+                current_width = word_width
+            else:
+                current_words.append(word)
+                current_width = new_width
+        lines.append(' '.join(current_words))
+
+    return lines
+
+
+class TextLayout:
+    """
+    Resultado de maquetar un texto: líneas, fuente y dimensiones del bloque.
+    """
+    def __init__(self, lines, font_size, fonts=FONT_CANDIDATES):
+        self.lines = lines
+        self.font_size = font_size
+        self.fonts = fonts
+        self.font = get_font(font_size, fonts)
+        self.line_height = int(get_line_height(font_size, fonts) * LINE_SPACING)
+        self.width = max((measure_line(font_size, line, fonts) for line in lines), default=0)
+        self.height = self.line_height * len(lines)
+
+    def line_centers(self, center_x, center_y):
+        """Obtiene el punto central (x, y) de cada línea para centrar el bloque"""
+        top = center_y - self.height / 2
+        return [(center_x, top + self.line_height * (i + 0.5)) for i in range(len(self.lines))]
+
+    def word_positions(self, center_x, center_y):
+        """
+        Obtiene (palabra, x izquierda, y central) de cada palabra del bloque,
+        con cada línea centrada horizontalmente en `center_x`.
+        """
+        space = get_glyph_width(self.font_size, ' ', self.fonts)
+        positions = []
+        for line, (_, y) in zip(self.lines, self.line_centers(center_x, center_y)):
+            x = center_x - measure_line(self.font_size, line, self.fonts) / 2
+            for word in line.split(' '):
+                if word:
+                    positions.append((word, x, y))
+                x += measure_word(self.font_size, word, self.fonts) + space
+        return positions
+
+
+def fit_text(text, max_width=SAFE_WIDTH, max_height=SAFE_HEIGHT,
+             min_size=MIN_FONT_SIZE, max_size=MAX_FONT_SIZE, fonts=FONT_CANDIDATES):
+    """
+    Busca por bisección el mayor tamaño de fuente con el que el texto, una vez
+    ajustado en líneas, cabe en la zona segura. Si ni siquiera el tamaño
+    mínimo cabe, se usa el tamaño mínimo.
+
+    `fonts` es una tupla de fuentes candidatas en orden de preferencia.
+    """
+    fonts = tuple(fonts)
+    best = TextLayout(wrap_text(text, min_size, max_width, fonts), min_size, fonts)
+    low, high = min_size + 1, max_size
+
+    while low <= high:
+        size = (low + high) // 2
+        layout = TextLayout(wrap_text(text, size, max_width, fonts), size, fonts)
+        if layout.width <= max_width and layout.height <= max_height:
+            best = layout
+            low = size + 1
+        else:
+            high = size - 1
+
+    return best
+
+
+def render_text_card(layout, color=(255, 255, 255), size=(1080, 1920), center=(540, 960)):
+    """
+    Dibuja el texto maquetado, centrado y con sombra, sobre una imagen RGBA
+    transparente del tamaño del video.
+    """
+    img = Image.new('RGBA', size, color=(0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    for line, (x, y) in zip(layout.lines, layout.line_centers(*center)):
+        # Primero la sombra
+        draw.text((x + 3, y + 3), line, fill="black", anchor="mm", font=layout.font)
+        # Luego el texto principal
+        draw.text((x, y), line, fill=tuple(color), anchor="mm", font=layout.font)
+    return np.array(img)
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import numpy as np
+from PIL import Image, ImageDraw
+from content_diversifier import ContentDiversifier
+from text_layout import FONT_CANDIDATES, get_font, measure_line
+
+# Versión del dibujo de plantillas: cambiarla invalida todas las plantillas en disco
+TEMPLATE_VERSION = 1
+
+# Tema base; los demás temas solo indican lo que cambian respecto a este
+DEFAULT_THEME = {
+    "background": [20, 30, 50],
+    "animated": False,
+    "palette": [[20, 30, 50], [40, 30, 80], [15, 60, 90]],
+    "text_color": [255, 255, 255],
+    "highlight_color": [255, 214, 0],
+    "fonts": list(FONT_CANDIDATES),
+    "badge": None
+}
+
+# Temas por tipo de contenido
+THEMES = {
+    "default": {},
+    "thoughts": {
+        "background": [34, 22, 58],
+        "palette": [[34, 22, 58], [70, 40, 110], [30, 50, 100]],
+        "badge": {"text": "r/{subreddit}", "background": [124, 77, 255], "color": [255, 255, 255]}
+    },
+    "advice": {
+        "background": [16, 44, 38],
+        "palette": [[16, 44, 38], [20, 80, 60], [30, 60, 40]],
+        "highlight_color": [120, 255, 160],
+        "badge": {"text": "r/{subreddit}", "background": [38, 166, 91], "color": [255, 255, 255]}
+    },
+    "question": {
+        "background": [48, 24, 18],
+        "palette": [[48, 24, 18], [90, 40, 20], [60, 30, 50]],
+        "badge": {"text": "r/{subreddit}", "background": [255, 69, 0], "color": [255, 255, 255]}
+    },
+    "educational": {
+        "background": [12, 38, 56],
+        "palette": [[12, 38, 56], [10, 70, 90], [30, 40, 80]],
+        "highlight_color": [110, 220, 255],
+        "badge": {"text": "r/{subreddit}", "background": [0, 150, 199], "color": [255, 255, 255]}
+    },
+    "confession": {
+        "background": [40, 14, 22],
+        "palette": [[40, 14, 22], [80, 20, 40], [40, 20, 60]],
+        "highlight_color": [255, 120, 150],
+        "badge": {"text": "r/{subreddit}", "background": [200, 40, 80], "color": [255, 255, 255]}
+    },
+    "opinion": {
+        "background": [46, 36, 12],
+        "palette": [[46, 36, 12], [90, 60, 10], [60, 30, 20]],
+        "badge": {"text": "r/{subreddit}", "background": [230, 160, 0], "color": [20, 20, 20]}
+    },
+    "story": {
+        "background": [26, 26, 30],
+        "palette": [[26, 26, 30], [50, 40, 60], [30, 50, 60]],
+        "badge": {"text": "r/{subreddit}", "background": [90, 90, 110], "color": [255, 255, 255]}
+    }
+}
+
+# Tema de cada tipo de contenido de ContentDiversifier.SUBREDDIT_CATEGORIES: un
+# subreddit usa el tema de su primera categoría que aparezca aquí ("default" si ninguna)
+CATEGORY_THEMES = {
+    "thoughts": "thoughts",
+    "mind-blowing": "thoughts",
+    "reflection": "thoughts",
+    "tips": "advice",
+    "advice": "advice",
+    "life-hack": "advice",
+    "important": "advice",
+    "knowledge": "advice",
+    "question": "question",
+    "explanation": "educational",
+    "educational": "educational",
+    "fact": "educational",
+    "confession": "confession",
+    "secret": "confession",
+    "controversial": "opinion",
+    "opinion": "opinion",
+    "debate": "opinion",
+    "mistake": "story",
+    "embarrassing": "story",
+    "story": "story"
+}
+
+# Posición y tamaño de la insignia superior
+BADGE_CENTER_Y = 170
+BADGE_FONT_SIZE = 44
+BADGE_PADDING = (36, 18)
+
+
+class ThemeTemplate:
+    """
+    Plantilla visual ya renderizada para un tema y un subreddit.
+
+    - frame: fotograma RGB con el fondo y la insignia (para fondos estáticos)
+    - chrome: capa RGBA solo con la insignia (para superponer a fondos animados)
+    """
+    def __init__(self, name, definition, key, frame, chrome):
+        self.name = name
+        self.definition = definition
+        self.key = key
+        self.frame = frame
+        self.chrome = chrome
+        self.animated = bool(definition["animated"])
+        self.palette = tuple(tuple(color) for color in definition["palette"])
+        self.fonts = tuple(definition["fonts"])
+        self.text_color = tuple(definition["text_color"])
+        self.highlight_color = tuple(definition["highlight_color"])
+
+
+class ThemeManager:
+    """
+    Clase para resolver el tema de cada subreddit y mantener sus plantillas
+    prerrenderizadas en memoria y en disco.
+
+    El tema de cada subreddit se deduce de sus categorías de contenido (ver
+    ContentDiversifier.get_categories). Los temas se pueden ajustar en
+    content_config.json con las claves "themes" (cambios sobre cada tema) y
+    "subreddit_themes" (asignaciones directas, que tienen prioridad).
+    Cada plantilla se identifica por un hash de su definición, de modo que
+    al cambiar un tema se vuelve a renderizar automáticamente.
+    """
+    def __init__(self, config=None, cache_dir='theme_cache', size=(1080, 1920), content_diversifier=None):
+        self.config = config or {}
+        self.content_diversifier = content_diversifier
+        self.cache_dir = cache_dir
+        self.size = tuple(size)
+        self._templates = {}
+
+    def get_theme_name(self, subreddit):
+        """Obtiene el nombre del tema asignado a un subreddit"""
+        if not subreddit:
+            return "default"
+        assignments = {name.lower(): theme for name, theme in self.config.get("subreddit_themes", {}).items()}
+        if subreddit.lower() in assignments:
+            return assignments[subreddit.lower()]
+
+        if self.content_diversifier is None:
+            self.content_diversifier = ContentDiversifier()
+        for category in self.content_diversifier.get_categories(subreddit):
+            if category in CATEGORY_THEMES:
+                return CATEGORY_THEMES[category]
+        return "default"
+
+    def get_theme_definition(self, name):
+        """Combina el tema base, el tema indicado y los ajustes de la configuración"""
+        definition = dict(DEFAULT_THEME)
+        definition.update(THEMES.get(name, {}))
+        definition.update(self.config.get("themes", {}).get(name, {}))
+        return definition
+
+    def _template_key(self, name, definition, subreddit):
+        """Hash que identifica una plantilla: cambia si cambia cualquier parámetro"""
+        payload = json.dumps({
+            "version": TEMPLATE_VERSION,
+            "theme": name,
+            "definition": definition,
+            "subreddit": subreddit if definition.get("badge") else None,
+            "size": self.size
+        }, sort_keys=True)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+    def get_template(self, subreddit=None):
+        """Obtiene la plantilla de un subreddit, renderizándola solo si no está en caché"""
+        name = self.get_theme_name(subreddit)
+        definition = self.get_theme_definition(name)
+        key = self._template_key(name, definition, subreddit)
+
+        if key not in self._templates:
+            frame, chrome = self._load_from_disk(key)
+            if frame is None:
+                frame, chrome = self._render(definition, subreddit)
+                self._save_to_disk(key, frame, chrome)
+            self._templates[key] = ThemeTemplate(name, definition, key, frame, chrome)
+        return self._templates[key]
+
+    def _render(self, definition, subreddit):
+        """Dibuja el fondo y la insignia del tema"""
+        chrome = Image.new('RGBA', self.size, (0, 0, 0, 0))
+        badge = definition.get("badge")
+        if badge:
+            self._draw_badge(chrome, badge, subreddit, tuple(definition["fonts"]))
+
+        frame = Image.new('RGB', self.size, tuple(definition["background"]))
+        frame.paste(chrome, (0, 0), chrome)
+        return np.array(frame), np.array(chrome)
+
+    def _draw_badge(self, image, badge, subreddit, fonts):
+        """Dibuja la insignia con el nombre del subreddit en la parte superior"""
+        text = badge["text"].format(subreddit=subreddit or "reddit")
+        font = get_font(BADGE_FONT_SIZE, fonts)
+        text_width = measure_line(BADGE_FONT_SIZE, text, fonts)
+        pad_x, pad_y = BADGE_PADDING
+        center_x = self.size[0] / 2
+        half_w = text_width / 2 + pad_x
+        half_h = BADGE_FONT_SIZE / 2 + pad_y
+
+        draw = ImageDraw.Draw(image)
+        draw.rounded_rectangle(
+            (center_x - half_w, BADGE_CENTER_Y - half_h, center_x + half_w, BADGE_CENTER_Y + half_h),
+            radius=int(half_h), fill=tuple(badge["background"]))
+        draw.text((center_x, BADGE_CENTER_Y), text, fill=tuple(badge["color"]), anchor="mm", font=font)
+
+    def _cache_paths(self, key):
+        return (os.path.join(self.cache_dir, f"{key}_frame.png"),
+                os.path.join(self.cache_dir, f"{key}_chrome.png"))
+
+    def _load_from_disk(self, key):
+        """Carga una plantilla ya renderizada en una ejecución anterior"""
+        frame_path, chrome_path = self._cache_paths(key)
+        if not (os.path.exists(frame_path) and os.path.exists(chrome_path)):
+            return None, None
+        try:
+            with Image.open(frame_path) as frame, Image.open(chrome_path) as chrome:
+                return np.array(frame.convert('RGB')), np.array(chrome.convert('RGBA'))
+        except OSError as e:
+            print(f"Error al leer la plantilla {key} desde la caché: {str(e)}")
+            return None, None
+
+    def _save_to_disk(self, key, frame, chrome):
+        """Guarda una plantilla renderizada para reutilizarla entre ejecuciones"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            frame_path, chrome_path = self._cache_paths(key)
+            Image.fromarray(frame).save(frame_path)
+            Image.fromarray(chrome).save(chrome_path)
+        except OSError as e:
+            print(f"No se pudo guardar la plantilla {key} en la caché: {str(e)}")
@@ -0,0 +1,89 @@
+import hashlib
+import re
+import numpy as np
+
+# Distancia de Hamming máxima entre huellas para considerar dos títulos casi idénticos
+MAX_DISTANCE = 3
+
+FINGERPRINT_BITS = 64
+_BIT_SHIFTS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Etiquetas al principio del título que no cambian la historia ("TIL ...", "LPT: ...")
+TITLE_TAGS = {"til", "lpt", "ysk", "eli5", "tifu", "psa", "cmv", "aita", "wibta"}
+
+
+def title_features(title):
+    """Palabras y pares de palabras consecutivas del título normalizado"""
+    words = _WORD_RE.findall(title.lower().replace("'", ""))
+    while words and words[0] in TITLE_TAGS:
+        words = words[1:]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def simhash(title):
+    """
+    Huella SimHash de 64 bits de un título: cada rasgo vota por los bits de
+    su hash, de modo que títulos con casi los mismos rasgos tienen huellas
+    que difieren en muy pocos bits. Devuelve 0 si el título no tiene palabras.
+    """
+    features = title_features(title)
+    if not features:
+        return 0
+    # hashlib en lugar de hash(): la huella debe ser igual en todos los procesos
+    digests = b''.join(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest() for feature in features)
+    hashes = np.frombuffer(digests, dtype='<u8')
+    ones = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).sum(axis=0)
+    return sum(1 << int(bit) for bit in np.flatnonzero(ones * 2 > len(features)))
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+class TitleIndex:
+    """
+    Índice de huellas SimHash con búsqueda LSH por bandas.
+
+    La huella se divide en MAX_DISTANCE + 1 bandas: si dos huellas difieren
+    en MAX_DISTANCE bits o menos, al menos una banda es idéntica, así que
+    basta con comparar las huellas que comparten alguna banda con la buscada.
+    Cada búsqueda consulta unos pocos diccionarios, independientemente del
+    número de títulos del índice.
+    """
+    def __init__(self, max_distance=MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.band_count = max_distance + 1
+        self.band_bits = FINGERPRINT_BITS // self.band_count
+        self._band_mask = (1 << self.band_bits) - 1
+        self._buckets = [{} for _ in range(self.band_count)]
+        self._fingerprints = {}
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def _bands(self, fingerprint):
+        for band in range(self.band_count):
+            yield band, (fingerprint >> (band * self.band_bits)) & self._band_mask
+
+    def add(self, key, fingerprint):
+        """Añade la huella de un post (las huellas vacías no se indexan)"""
+        if not fingerprint or key in self._fingerprints:
+            return
+        self._fingerprints[key] = fingerprint
+        for band, value in self._bands(fingerprint):
+            self._buckets[band].setdefault(value, []).append(key)
+
+    def find(self, fingerprint):
+        """Clave de un post indexado con una huella casi idéntica, o None"""
+        if not fingerprint:
+            return None
+        for band, value in self._bands(fingerprint):
+            for key in self._buckets[band].get(value, ()):
+                if hamming_distance(fingerprint, self._fingerprints[key]) <= self.max_distance:
+                    return key
+        return None
+
+    def find_title(self, title):
+        return self.find(simhash(title))
@@ -0,0 +1,124 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+
+class TTSCache:
+    """
+    Caché en disco de los audios generados por text_to_speech.
+
+    Cada audio se identifica por un hash del texto, la voz, la velocidad, la
+    versión del motor y la extensión del archivo, así que volver a renderizar
+    el mismo post (otro perfil, otro tema o un reintento) no vuelve a
+    sintetizar la voz. El tamaño total está limitado y, al superarlo, se
+    eliminan primero los audios usados hace más tiempo (LRU).
+    """
+    def __init__(self, cache_dir='tts_cache', max_bytes=200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_file = os.path.join(cache_dir, 'index.json')
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.index = self._load_index()
+
+    def _load_index(self):
+        """Carga el índice de la caché desde el archivo"""
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r') as f:
+                    return json.load(f)
+            except json.JSONDecodeError:
+                print(f"Error al leer el archivo {self.index_file}, creando un nuevo índice")
+        return {"entries": {}}
+
+    def _save_index(self):
+        """Guarda el índice en disco de forma atómica"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_file = self.index_file + '.tmp'
+        with open(temp_file, 'w') as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(temp_file, self.index_file)
+
+    @staticmethod
+    def make_key(text, voice_id=None, rate=None, engine_version=None, extension='.mp3'):
+        """Calcula la clave de un audio a partir de todo lo que influye en su contenido"""
+        payload = json.dumps({
+            "text": text,
+            "voice_id": voice_id,
+            "rate": rate,
+            "engine_version": engine_version,
+            "extension": extension.lower()
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key, extension):
+        return os.path.join(self.cache_dir, f"{key}{extension}")
+
+    def fetch(self, key, destination):
+        """Copia el audio en caché a `destination`. Devuelve False si no está en caché"""
+        with self._lock:
+            entry = self.index["entries"].get(key)
+            if entry is None or not os.path.exists(self._entry_path(key, entry["extension"])):
+                if entry is not None:
+                    del self.index["entries"][key]
+                self.misses += 1
+                return False
+
+            shutil.copyfile(self._entry_path(key, entry["extension"]), destination)
+            entry["last_used"] = time.time()
+            self.hits += 1
+            self._save_index()
+            return True
+
+    def store(self, key, source):
+        """Guarda una copia del audio en la caché y aplica el límite de tamaño"""
+        with self._lock:
+            extension = os.path.splitext(source)[1]
+            os.makedirs(self.cache_dir, exist_ok=True)
+            shutil.copyfile(source, self._entry_path(key, extension))
+            self.index["entries"][key] = {
+                "extension": extension,
+                "size": os.path.getsize(source),
+                "last_used": time.time()
+            }
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        """Elimina los audios usados hace más tiempo hasta respetar el tamaño máximo"""
+        entries = self.index["entries"]
+        total = sum(entry["size"] for entry in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            entry = entries.pop(key)
+            total -= entry["size"]
+            try:
+                os.remove(self._entry_path(key, entry["extension"]))
+            except OSError:
+                pass
+
+    def get_total_size(self):
+        """Tamaño total en bytes de los audios en caché"""
+        return sum(entry["size"] for entry in self.index["entries"].values())
+
+    def get_stats(self):
+        """Aciertos y fallos de la caché en este proceso, audios guardados y tamaño total"""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.index["entries"]),
+                    "size": self.get_total_size(), "max_bytes": self.max_bytes}
+
+
+_cache = None
+
+
+def get_tts_cache():
+    """Obtiene la caché de TTS compartida por todo el proceso"""
+    global _cache
+    if _cache is None:
+        _cache = TTSCache()
+    return _cache
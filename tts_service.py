@@ -0,0 +1,254 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+import numpy as np
+from audio_processing import SPEECH_SAMPLE_RATE, decode_pcm, write_pcm
+
+# Los textos más cortos se sintetizan de una vez en el servicio principal. El
+# bot solo narra títulos (ContentFilter los limita a 250 caracteres), así que
+# la síntesis por fragmentos solo se usa con textos largos pasados a
+# synthesize_text directamente: con un título, arrancar varios procesos cuesta
+# más que sintetizarlo de una vez
+MIN_CHUNKED_CHARS = 600
+
+# Tamaño máximo aproximado de cada fragmento y pausa entre fragmentos
+MAX_CHUNK_CHARS = 300
+CHUNK_PAUSE = 0.25
+
+
+def find_english_voice(voices):
+    """Devuelve el id de la primera voz en inglés disponible, o None"""
+    for v in voices:
+        lang = v.languages[0].decode('utf-8') if v.languages and hasattr(v.languages[0], 'decode') else ''
+        if 'en' in lang or 'English' in v.name:
+            return v.id
+    return None
+
+
+class TTSService:
+    """
+    Servicio de texto a voz de larga duración.
+
+    El motor de pyttsx3 se inicializa una sola vez y la voz se elige una sola
+    vez; después, todas las peticiones de síntesis se atienden en orden desde
+    una cola. Un único hilo de trabajo crea y usa el motor, ya que pyttsx3 no
+    admite usar el mismo motor desde varios hilos.
+    """
+    def __init__(self, rate=None):
+        self.rate = rate
+        self.voice_id = None
+        self.engine_version = None
+        self.requests_served = 0
+        self.engine_restarts = 0
+        self._engine = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._worker, name='tts-service', daemon=True)
+        self._thread.start()
+
+    def _init_engine(self):
+        """Crea el motor y resuelve la voz (solo la primera vez o tras un fallo)"""
+        import pyttsx3
+        engine = pyttsx3.init()
+        if self.voice_id is None:
+            self.voice_id = find_english_voice(engine.getProperty('voices'))
+        if self.voice_id is not None:
+            engine.setProperty('voice', self.voice_id)
+        if self.rate is not None:
+            engine.setProperty('rate', self.rate)
+        else:
+            self.rate = engine.getProperty('rate')
+        self.engine_version = getattr(pyttsx3, '__version__', None)
+        self._engine = engine
+
+    def _worker(self):
+        """Atiende las peticiones de la cola una a una"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            func, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                if self._engine is None:
+                    self._init_engine()
+                future.set_result(func(self._engine))
+            except Exception as e:
+                # Descartar el motor: se volverá a crear en la siguiente petición
+                self._engine = None
+                self.engine_restarts += 1
+                future.set_exception(e)
+
+    def _call(self, func):
+        """Encola una función que recibe el motor y se ejecuta en el hilo de trabajo"""
+        future = Future()
+        self._queue.put((func, future))
+        return future
+
+    def _save(self, engine, text, filename):
+        engine.save_to_file(text, filename)
+        engine.runAndWait()
+        self.requests_served += 1
+        return filename
+
+    def submit(self, text, filename):
+        """Encola una petición de síntesis y devuelve un Future con el nombre del archivo"""
+        return self._call(lambda engine: self._save(engine, text, filename))
+
+    def synthesize(self, text, filename, timeout=None):
+        """Sintetiza el texto en el archivo indicado y espera a que termine"""
+        return self.submit(text, filename).result(timeout=timeout)
+
+    def voice_settings(self):
+        """
+        Obtiene la voz, la velocidad y la versión del motor, inicializándolo
+        si todavía no se ha usado.
+        """
+        self._call(lambda engine: None).result()
+        return {"voice_id": self.voice_id, "rate": self.rate, "engine_version": self.engine_version}
+
+    def get_stats(self):
+        """Síntesis atendidas por el motor principal y veces que hubo que recrearlo tras un fallo"""
+        return {"requests_served": self.requests_served, "engine_restarts": self.engine_restarts}
+
+    def shutdown(self):
+        """Detiene el hilo de trabajo después de atender las peticiones pendientes"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+
+
+def split_sentences(text, max_chars=MAX_CHUNK_CHARS):
+    """
+    Divide el texto en fragmentos de frases completas. Las frases cortas se
+    agrupan hasta max_chars para que el coste fijo de cada síntesis no domine.
+    """
+    sentences = [s for s in re.split(r'(?<=[.!?])\s+', text.strip()) if s]
+    chunks = []
+    for sentence in sentences:
+        if chunks and len(chunks[-1]) + len(sentence) + 1 <= max_chars:
+            chunks[-1] += ' ' + sentence
+        else:
+            chunks.append(sentence)
+    return chunks
+
+
+@lru_cache(maxsize=8)
+def get_silence(duration, sample_rate=SPEECH_SAMPLE_RATE):
+    """Bloque de silencio en PCM de 16 bits, compartido entre todas las uniones"""
+    silence = np.zeros(int(round(duration * sample_rate)), dtype=np.int16)
+    silence.flags.writeable = False
+    return silence
+
+
+def join_chunks(paths, filename, pause=CHUNK_PAUSE):
+    """Une los audios de los fragmentos en una sola pista separándolos con silencio"""
+    silence = get_silence(pause)
+    parts = []
+    for i, path in enumerate(paths):
+        if i:
+            parts.append(silence)
+        parts.append(decode_pcm(path))
+    write_pcm(np.concatenate(parts), filename)
+
+
+# Motor propio de cada proceso del pool de síntesis por fragmentos
+_worker_engine = None
+
+
+def _init_chunk_worker(voice_id, rate):
+    global _worker_engine
+    import pyttsx3
+    _worker_engine = pyttsx3.init()
+    if voice_id is not None:
+        _worker_engine.setProperty('voice', voice_id)
+    if rate is not None:
+        _worker_engine.setProperty('rate', rate)
+
+
+def _synthesize_chunk(text, filename):
+    _worker_engine.save_to_file(text, filename)
+    _worker_engine.runAndWait()
+    return filename
+
+
+class ChunkedSynthesizer:
+    """
+    Síntesis en paralelo para textos largos.
+
+    El texto se divide en fragmentos de frases completas que se reparten
+    entre un pool de procesos, cada uno con su propio motor de pyttsx3 (el
+    motor no se puede compartir entre procesos ni hilos). Los fragmentos se
+    unen después en una sola pista con una pausa de silencio entre ellos. El
+    pool se crea una sola vez y se reutiliza para todas las peticiones.
+    """
+    # Funciones que ejecuta cada proceso del pool; deben poder importarse desde el proceso hijo
+    worker_initializer = staticmethod(_init_chunk_worker)
+    worker_synthesize = staticmethod(_synthesize_chunk)
+
+    def __init__(self, voice_id=None, rate=None, workers=None):
+        self.workers = workers or max(1, min(4, os.cpu_count() or 1))
+        # spawn: el proceso principal ya tiene hilos (el del servicio de TTS)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                         mp_context=multiprocessing.get_context('spawn'),
+                                         initializer=self.worker_initializer, initargs=(voice_id, rate))
+
+    def synthesize(self, text, filename):
+        """Sintetiza el texto por fragmentos en paralelo y los une en filename"""
+        chunks = split_sentences(text)
+        workdir = tempfile.mkdtemp(prefix='tts_chunks_')
+        try:
+            # Los fragmentos se guardan en WAV, el formato nativo de los motores
+            futures = [self._pool.submit(self.worker_synthesize, chunk, os.path.join(workdir, f"{i:04d}.wav"))
+                       for i, chunk in enumerate(chunks)]
+            join_chunks([future.result() for future in futures], filename)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        return filename
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+_service = None
+_service_lock = threading.Lock()
+_chunked = None
+
+
+def get_tts_service():
+    """Obtiene el servicio de TTS compartido por todo el proceso"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TTSService()
+            atexit.register(_service.shutdown)
+        return _service
+
+
+def get_chunked_synthesizer():
+    """Obtiene el pool de síntesis por fragmentos, con la misma voz que el servicio"""
+    global _chunked
+    service = get_tts_service()
+    with _service_lock:
+        if _chunked is None:
+            settings = service.voice_settings()
+            _chunked = ChunkedSynthesizer(settings["voice_id"], settings["rate"])
+            atexit.register(_chunked.shutdown)
+        return _chunked
+
+
+def synthesize_text(text, filename):
+    """
+    Sintetiza el texto en filename: los textos largos con varias frases se
+    reparten entre el pool de procesos y el resto va al servicio principal.
+    """
+    if len(text) >= MIN_CHUNKED_CHARS and len(split_sentences(text)) > 1:
+        return get_chunked_synthesizer().synthesize(text, filename)
+    return get_tts_service().synthesize(text, filename)
@@ -0,0 +1,247 @@
+import os
+import subprocess
+import tempfile
+import numpy as np
+from moviepy.config import FFMPEG_BINARY
+from audio_processing import probe_audio
+from render_profiles import ffmpeg_audio_args, ffmpeg_silence_input, ffmpeg_video_args, get_render_profile
+
+# Modos de renderizado soportados por create_video
+RENDER_MODES = ('auto', 'still', 'stream', 'composite')
+
+
+def audio_output_args(audio_path, profile):
+    """
+    Argumentos de audio para el video final: si la pista ya está en el códec,
+    la frecuencia y los canales del perfil se copia tal cual (sin otra
+    generación de pérdida ni tiempo de CPU); si no, se codifica.
+    """
+    info = probe_audio(audio_path)
+    if info and info["codec"] == profile["audio_codec"] and info["rate"] == profile["audio_rate"] \
+            and info["channels"] == profile["audio_channels"]:
+        return ['-c:a', 'copy']
+    return ffmpeg_audio_args(profile)
+
+
+def write_still_video(frame, audio_path, output_path, duration, profile=None):
+    """
+    Codifica un único fotograma repetido durante `duration` segundos junto
+    con el audio indicado, sin componer ni enviar un fotograma por cada
+    instante del video.
+
+    El fotograma se envía una sola vez a ffmpeg por stdin y el filtro `loop`
+    se encarga de repetirlo hasta completar la duración. Si audio_path es
+    None, el video lleva una pista de silencio.
+    """
+    if profile is None:
+        profile = get_render_profile()
+
+    frame = np.ascontiguousarray(frame[:, :, :3], dtype=np.uint8)
+    height, width = frame.shape[:2]
+
+    cmd = [
+        FFMPEG_BINARY, '-y', '-loglevel', 'error',
+        # Entrada 0: un fotograma RGB sin comprimir desde stdin
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+        '-s', f'{width}x{height}', '-framerate', str(profile["fps"]), '-i', '-',
+        # Entrada 1: la locución (o silencio)
+        *(['-i', audio_path] if audio_path else ffmpeg_silence_input(profile)),
+        '-filter:v', 'loop=loop=-1:size=1:start=0',
+        '-map', '0:v', '-map', '1:a',
+        '-t', f'{duration:.3f}',
+        *ffmpeg_video_args(profile), '-tune', 'stillimage',
+        *(audio_output_args(audio_path, profile) if audio_path else ffmpeg_audio_args(profile)),
+        '-movflags', '+faststart',
+        output_path
+    ]
+
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = process.communicate(frame.tobytes())
+    if process.returncode != 0:
+        raise Exception(f"Error de ffmpeg al codificar el video: {stderr.decode('utf-8', 'ignore').strip()}")
+
+
+class AlphaLayer:
+    """
+    Capa RGBA estática que se mezcla sobre cada fotograma.
+
+    Al crearla se recorta a la zona con píxeles visibles (y, si se indica
+    frame_size, a la parte que cae dentro del fotograma) y se precalculan el
+    color premultiplicado y el alfa inverso en enteros de 16 bits, de modo que
+    la mezcla por fotograma se limita a operaciones in-place sobre un búfer
+    de trabajo reutilizable.
+    """
+    def __init__(self, rgba, position=(0, 0), frame_size=None):
+        """
+        Args:
+            rgba: Imagen RGBA de la capa
+            position: Posición (x, y) de su esquina superior izquierda en el fotograma
+            frame_size: Tamaño (ancho, alto) del fotograma; la capa se recorta a él
+        """
+        rgba = np.asarray(rgba, dtype=np.uint8)
+        alpha = rgba[:, :, 3]
+        rows = np.flatnonzero(alpha.any(axis=1))
+        cols = np.flatnonzero(alpha.any(axis=0))
+        if rows.size == 0:
+            self.box = None
+            return
+
+        top, bottom = rows[0], rows[-1] + 1
+        left, right = cols[0], cols[-1] + 1
+        x, y = position
+        if frame_size is not None:
+            # Descartar lo que queda fuera del fotograma (por ejemplo, texto que no cabe)
+            width, height = frame_size
+            top, bottom = max(top, -y), min(bottom, height - y)
+            left, right = max(left, -x), min(right, width - x)
+            if top >= bottom or left >= right:
+                self.box = None
+                return
+        self.box = (y + top, y + bottom, x + left, x + right)
+
+        crop = rgba[top:bottom, left:right]
+        crop_alpha = crop[:, :, 3:4].astype(np.uint16)
+        self.premultiplied = crop[:, :, :3].astype(np.uint16) * crop_alpha
+        self.inverse_alpha = 255 - crop_alpha
+        self.scratch = np.empty(self.premultiplied.shape, dtype=np.uint16)
+
+    def state(self, t):
+        """La capa es estática: su contenido no depende de t"""
+        return None
+
+    def blit(self, buffer, t):
+        """Mezcla la capa sobre el búfer: (fondo * (255 - a) + color * a) / 255"""
+        if self.box is None:
+            return
+        top, bottom, left, right = self.box
+        region = buffer[top:bottom, left:right]
+        np.multiply(region, self.inverse_alpha, out=self.scratch)
+        self.scratch += self.premultiplied
+        self.scratch += 127
+        self.scratch //= 255
+        np.copyto(region, self.scratch, casting='unsafe')
+
+
+class StreamRenderer:
+    """
+    Renderizador que compone los fotogramas en un búfer preasignado y los
+    envía directamente a un proceso de ffmpeg por stdin.
+
+    A diferencia de CompositeVideoClip, no se crea un fotograma nuevo por
+    capa ni por instante: el fondo se copia sobre el mismo búfer, las capas
+    se mezclan in-place y el búfer se escribe en la tubería sin copias
+    intermedias. El audio lo lee ffmpeg directamente del archivo original y
+    lo copia sin recodificar si ya está en el formato del perfil.
+
+    Cada capa expone state(t); si el fondo es estático y ninguna capa cambia
+    de estado entre dos fotogramas, el búfer anterior se reutiliza tal cual.
+    """
+    def __init__(self, background, fps=24, static_background=False):
+        """
+        Args:
+            background: Función t -> fotograma RGB (por ejemplo clip.get_frame)
+                o un array RGB fijo
+            fps: Fotogramas por segundo del video resultante
+            static_background: Indica que la función de fondo siempre devuelve
+                el mismo fotograma
+        """
+        if callable(background):
+            self.background = background
+            self.static_background = static_background
+        else:
+            static_frame = np.asarray(background, dtype=np.uint8)
+            self.background = lambda t: static_frame
+            self.static_background = True
+        self.fps = fps
+        self.layers = []
+
+        first_frame = self.background(0)
+        self.height, self.width = first_frame.shape[:2]
+        self.buffer = np.empty((self.height, self.width, 3), dtype=np.uint8)
+
+    def add_layer(self, layer):
+        """Añade una capa con un método blit(buffer, t)"""
+        self.layers.append(layer)
+        return layer
+
+    def add_overlay(self, rgba, position=(0, 0)):
+        """Añade una imagen RGBA estática sobre el fondo"""
+        return self.add_layer(AlphaLayer(rgba, position, (self.width, self.height)))
+
+    def iter_frames(self, duration):
+        """
+        Genera los fotogramas del video. Siempre devuelve el mismo búfer, que
+        se sobrescribe en cada iteración.
+        """
+        n_frames = int(round(duration * self.fps))
+        previous_state = None
+        for i in range(n_frames):
+            t = i / self.fps
+            state = tuple(layer.state(t) for layer in self.layers)
+            if i == 0 or not self.static_background or state != previous_state:
+                np.copyto(self.buffer, self.background(t)[:, :, :3], casting='unsafe')
+                for layer in self.layers:
+                    layer.blit(self.buffer, t)
+                previous_state = state
+            yield self.buffer
+
+    def write(self, output_path, audio_path, duration, profile=None):
+        """Codifica el video enviando los fotogramas a ffmpeg y mezclando el audio del archivo"""
+        if profile is None:
+            profile = get_render_profile()
+        self.fps = profile["fps"]
+
+        cmd = [
+            FFMPEG_BINARY, '-y', '-loglevel', 'error',
+            # Entrada 0: fotogramas RGB sin comprimir desde stdin
+            '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+            '-s', f'{self.width}x{self.height}', '-framerate', str(self.fps), '-i', '-',
+            # Entrada 1: la locución, leída directamente por ffmpeg
+            '-i', audio_path,
+            '-map', '0:v', '-map', '1:a',
+            '-t', f'{duration:.3f}',
+            *ffmpeg_video_args(profile),
+            *audio_output_args(audio_path, profile),
+            '-movflags', '+faststart',
+            output_path
+        ]
+
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            for frame in self.iter_frames(duration):
+                process.stdin.write(frame)
+        except BrokenPipeError:
+            pass
+        finally:
+            process.stdin.close()
+        stderr = process.stderr.read()
+        process.wait()
+        if process.returncode != 0:
+            raise Exception(f"Error de ffmpeg al codificar el video: {stderr.decode('utf-8', 'ignore').strip()}")
+
+
+def concat_segments(segment_paths, output_path):
+    """
+    Une varios videos con el demuxer concat de ffmpeg copiando los streams,
+    sin decodificar ni recodificar. Todos los segmentos deben tener los mismos
+    parámetros de codificación (mismo perfil de renderizado).
+    """
+    list_fd, list_path = tempfile.mkstemp(suffix='.ffconcat', text=True)
+    try:
+        with os.fdopen(list_fd, 'w') as f:
+            f.write('ffconcat version 1.0\n')
+            for path in segment_paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        cmd = [
+            FFMPEG_BINARY, '-y', '-loglevel', 'error',
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-c', 'copy', '-movflags', '+faststart',
+            output_path
+        ]
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise Exception(f"Error de ffmpeg al concatenar los segmentos: {result.stderr.decode('utf-8', 'ignore').strip()}")
+    finally:
+        os.remove(list_path)
@@ -0,0 +1,57 @@
+import time
+import numpy as np
+
+# Peso de cada comentario frente a un voto: los comentarios indican conversación
+COMMENT_WEIGHT = 2.0
+
+# Penalización por antigüedad (como en los rankings de Hacker News): la
+# interacción se divide por (horas + AGE_OFFSET_HOURS) ** GRAVITY
+GRAVITY = 1.5
+AGE_OFFSET_HOURS = 2.0
+
+# Exponente de la proporción de votos positivos: los posts polémicos puntúan menos
+RATIO_EXPONENT = 3.0
+
+# Proporción de votos positivos que se supone cuando el listado no la trae
+DEFAULT_UPVOTE_RATIO = 0.9
+
+
+def virality_scores(score, upvote_ratio, num_comments, created_utc, now=None):
+    """
+    Puntuación de viralidad de muchos posts a la vez: la velocidad a la que
+    acumulan votos y comentarios, corregida por su proporción de votos
+    positivos. Todos los argumentos son arrays de la misma longitud.
+    """
+    now = now or time.time()
+    score = np.maximum(np.nan_to_num(np.asarray(score, dtype=np.float64)), 0)
+    num_comments = np.maximum(np.nan_to_num(np.asarray(num_comments, dtype=np.float64)), 0)
+    upvote_ratio = np.nan_to_num(np.asarray(upvote_ratio, dtype=np.float64), nan=DEFAULT_UPVOTE_RATIO)
+    created_utc = np.nan_to_num(np.asarray(created_utc, dtype=np.float64), nan=now)
+
+    age_hours = np.maximum(now - created_utc, 0) / 3600
+    velocity = (score + COMMENT_WEIGHT * num_comments) / (age_hours + AGE_OFFSET_HOURS) ** GRAVITY
+    return np.log1p(velocity) * np.clip(upvote_ratio, 0, 1) ** RATIO_EXPONENT
+
+
+def rank_records(records, now=None):
+    """
+    Ordena registros de posts (PostRecord) de mayor a menor viralidad y guarda
+    la puntuación de cada uno en su atributo `virality`.
+    """
+    if not records:
+        return []
+    count = len(records)
+
+    def column(field):
+        return np.fromiter((getattr(record, field) if getattr(record, field) is not None else np.nan
+                            for record in records), dtype=np.float64, count=count)
+
+    scores = virality_scores(column('score'), column('upvote_ratio'), column('num_comments'),
+                             column('created_utc'), now)
+    order = np.argsort(-scores, kind='stable')
+    ranked = []
+    for index in order:
+        record = records[index]
+        record.virality = float(scores[index])
+        ranked.append(record)
+    return ranked